@@ -0,0 +1,348 @@
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+'''
+persistent caches
+'''
+
+import hashlib
+import io
+import json
+import os
+import pickle
+import sqlite3
+import tempfile
+import time
+
+from . import data
+from . import lines
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def get_default_dir():
+    base = os.environ.get('XDG_CACHE_HOME', '')
+    if not os.path.isabs(base):
+        base = os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'mwic')
+
+def load_object(path, key, *, classes=()):
+    # Return object stored with store_object(),
+    # or None if the file doesn't exist, is corrupted or has a different key.
+    # Only the classes listed (and the built-in containers) can be loaded.
+    try:
+        with open(path, 'rb') as file:
+            [file_key, obj] = _Unpickler(file, classes).load()
+    except Exception:  # pylint: disable=broad-except
+        return None
+    if file_key != key:
+        return None
+    return obj
+
+def store_object(path, key, obj):
+    # The cache is only an optimization,
+    # so don't complain if it can't be written.
+    dirname = os.path.dirname(path)
+    try:
+        os.makedirs(dirname, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=dirname, prefix='.mwic.', delete=False) as file:
+            try:
+                pickle.dump((key, obj), file, protocol=pickle.HIGHEST_PROTOCOL)
+                file.flush()
+                os.replace(file.name, path)
+            except BaseException:
+                os.unlink(file.name)
+                raise
+    except OSError:
+        pass
+
+class _Cache:
+
+    _table = None
+    _schema = None
+    _primary_key = None
+    max_size = None
+    max_age = 30 * 24 * 60 * 60  # 30 days
+
+    def __init__(self, path, *, stats, max_size=None):
+        if max_size is not None:
+            self.max_size = max_size
+        self._stats = stats
+        self._now = int(time.time())
+        self._new = {}
+        self._used = set()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=60)
+        table = self._table
+        with self._db:
+            self._db.execute(
+                f'CREATE TABLE IF NOT EXISTS {table} {self._schema}'
+            )
+            self._db.execute(
+                f'CREATE INDEX IF NOT EXISTS {table}_atime ON {table} (atime)'
+            )
+
+    def flush(self):
+        pass
+
+    def take_updates(self):
+        # Return (and forget) the updates that flush() would write.
+        # Worker processes hand them over to the main process,
+        # so that only one process writes to the database.
+        updates = (self._new, self._used)
+        self._new = {}
+        self._used = set()
+        return updates
+
+    def add_updates(self, updates):
+        [new, used] = updates
+        self._new.update(new)
+        self._used.update(used)
+
+    def _evict(self):
+        table = self._table
+        with self._db:
+            self._db.execute(
+                f'DELETE FROM {table} WHERE atime < ?',
+                (self._now - self.max_age,)
+            )
+            [n] = self._db.execute(f'SELECT COUNT(*) FROM {table}').fetchone()
+            if n <= self.max_size:
+                return
+            # All rows touched by a single run have the same atime,
+            # so delete exactly as many rows as needed,
+            # breaking ties by the primary key.
+            pkey = self._primary_key
+            self._db.execute(
+                f'DELETE FROM {table} WHERE ({pkey}) IN '
+                f'(SELECT {pkey} FROM {table} ORDER BY atime, {pkey} LIMIT ?)',
+                (n - self.max_size,)
+            )
+
+    def close(self):
+        self.flush()
+        self._evict()
+        self._db.close()
+
+class _WordCache(_Cache):
+
+    # Cache of results of a function that takes a word as argument.
+
+    _name = None
+    _column = None
+    _primary_key = 'key, word'
+
+    def __init__(self, path, key, *, stats, max_size=None):
+        super().__init__(path, stats=stats, max_size=max_size)
+        self._key = key
+
+    @staticmethod
+    def _encode(value):
+        return value
+
+    @staticmethod
+    def _decode(value):
+        return value
+
+    def wrap(self, function):
+        select = self._db.execute
+        query = f'SELECT {self._column} FROM {self._table} WHERE key = ? AND word = ?'
+        key = self._key
+        stats = self._stats
+        name = self._name
+        def cached_function(word):
+            row = select(query, (key, word)).fetchone()
+            if row is None:
+                stats[f'{name} cache misses'] += 1
+                value = function(word)
+                self._new[word] = value
+            else:
+                stats[f'{name} cache hits'] += 1
+                [value] = row
+                value = self._decode(value)
+                self._used.add(word)
+            return value
+        return cached_function
+
+    def flush(self):
+        key = self._key
+        now = self._now
+        table = self._table
+        with self._db:
+            self._db.executemany(
+                f'INSERT OR REPLACE INTO {table} VALUES (?, ?, ?, ?)',
+                ((key, word, self._encode(value), now) for word, value in self._new.items())
+            )
+            self._db.executemany(
+                f'UPDATE {table} SET atime = ? WHERE key = ? AND word = ? AND atime < ?',
+                ((now, key, word, now) for word in self._used)
+            )
+        self._new.clear()
+        self._used.clear()
+
+class VerdictCache(_WordCache):
+
+    '''
+    cache of spell-checking verdicts
+    '''
+
+    _table = 'verdicts'
+    _schema = '(key TEXT, word TEXT, ok INTEGER, atime INTEGER, PRIMARY KEY (key, word)) WITHOUT ROWID'
+    _name = 'verdict'
+    _column = 'ok'
+    max_size = 1 << 20
+
+    @staticmethod
+    def _decode(value):
+        return bool(value)
+
+    def wrap(self, function):
+        return super().wrap(lambda word: bool(function(word)))
+
+class SuggestionCache(_WordCache):
+
+    '''
+    cache of spell-checker suggestions
+    '''
+
+    _table = 'suggestions'
+    _schema = '(key TEXT, word TEXT, suggestions TEXT, atime INTEGER, PRIMARY KEY (key, word)) WITHOUT ROWID'
+    _name = 'suggestion'
+    _column = 'suggestions'
+    max_size = 1 << 16
+
+    @staticmethod
+    def _encode(value):
+        return json.dumps(value)
+
+    @staticmethod
+    def _decode(value):
+        return tuple(json.loads(value))
+
+class _Pickler(pickle.Pickler):
+
+    # Don't store lines.Source objects:
+    # the file could have been renamed or copied since.
+    def persistent_id(self, obj):
+        if isinstance(obj, lines.Source):
+            return 'source'
+        return None
+
+class _Unpickler(pickle.Unpickler):
+
+    # The cache directory can be shared, e.g. between CI runs,
+    # so don't let the data refer to arbitrary callables.
+
+    def __init__(self, file, classes, *, source=None):
+        super().__init__(file)
+        self._classes = {
+            (cls.__module__, cls.__qualname__): cls
+            for cls in [*classes, set, frozenset]
+        }
+        self._source = source
+
+    def find_class(self, module, name):
+        cls = self._classes.get((module, name))
+        if cls is None:
+            raise pickle.UnpicklingError(f'forbidden global: {module}.{name}')
+        return cls
+
+    def persistent_load(self, pid):
+        if pid == 'source' and self._source is not None:
+            return self._source
+        raise pickle.UnpicklingError(f'unsupported persistent object: {pid!r}')
+
+class FindingsCache(_Cache):
+
+    '''
+    cache of per-file misspellings
+    '''
+
+    _table = 'findings'
+    _schema = '(key TEXT PRIMARY KEY, data BLOB, atime INTEGER)'
+    _primary_key = 'key'
+    _classes = [
+        data.Misspellings,
+        data._Dropped,  # pylint: disable=protected-access
+        lines.LazyLine,
+    ]
+    max_size = 1 << 17
+
+    def __init__(self, path, key, *, stats, max_size=None):
+        super().__init__(path, stats=stats, max_size=max_size)
+        self._key = key
+
+    def get_key(self, path):
+        key = f'{self._key} {file_digest(path)}'
+        return hashlib.sha256(key.encode('UTF-8')).hexdigest()
+
+    def get(self, key, *, source=None):
+        blob = self._new.get(key)
+        if blob is None:
+            row = self._db.execute('SELECT data FROM findings WHERE key = ?', (key,)).fetchone()
+            if row is not None:
+                [blob] = row
+        misspellings = None
+        if blob is not None:
+            try:
+                misspellings = _Unpickler(io.BytesIO(blob), self._classes, source=source).load()
+            except Exception:  # pylint: disable=broad-except
+                pass
+        if misspellings is None:
+            self._stats['findings cache misses'] += 1
+            return None
+        self._stats['findings cache hits'] += 1
+        self._used.add(key)
+        return misspellings
+
+    def put(self, key, misspellings):
+        file = io.BytesIO()
+        _Pickler(file, protocol=pickle.HIGHEST_PROTOCOL).dump(misspellings)
+        self._new[key] = file.getvalue()
+
+    def flush(self):
+        now = self._now
+        with self._db:
+            self._db.executemany(
+                'INSERT OR REPLACE INTO findings VALUES (?, ?, ?)',
+                ((key, blob, now) for key, blob in self._new.items())
+            )
+            self._db.executemany(
+                'UPDATE findings SET atime = ? WHERE key = ? AND atime < ?',
+                ((now, key, now) for key in self._used)
+            )
+        self._new.clear()
+        self._used.clear()
+
+__all__ = [
+    'FindingsCache',
+    'SuggestionCache',
+    'VerdictCache',
+    'file_digest',
+    'get_default_dir',
+    'load_object',
+    'store_object',
+]
+
+# vim:ts=4 sts=4 sw=4 et
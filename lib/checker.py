@@ -0,0 +1,379 @@
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+'''
+spell-checking API
+
+Example::
+
+   with Checker('en-US', blacklist=['corrections']) as checker:
+       for finding in checker.check_text(text):
+           print(finding.lineno, finding.column, finding.word)
+'''
+
+import collections
+import functools
+import glob
+import hashlib
+import io
+import itertools
+import os
+import re
+
+import enchant.tokenize
+
+from . import cache
+from . import extdict
+from . import intdict
+from . import knownwords
+from . import symspell
+from . import text
+from .version import __version__
+
+Finding = collections.namedtuple('Finding', [
+    'word',
+    'line',  # normalized line
+    'lineno',
+    'column',  # position in the normalized line
+    'certainty',  # 1 = definitely misspelled, 0 = unknown word
+    'source',  # 'blacklist', 'spellchecker' or 'multi-word'
+])
+
+# Stages of word lookup, in the default order.
+# Blacklisted words are misspelled;
+# words found in any other stage are spelled correctly.
+lookup_stages = (
+    'blacklist',
+    'known-words',
+    'spellchecker',
+    'whitelist',
+)
+
+def get_dictionary(language):
+    if language == 'und':
+        return None
+    return enchant.Dict(language)
+
+# Directories in which the providers usually look for dictionaries,
+# in addition to the user config directory and $DICPATH:
+dictionary_dirs = [
+    '/usr/share/hunspell',
+    '/usr/share/myspell',
+    '/usr/share/myspell/dicts',
+    '/usr/share/aspell',
+    '/usr/lib/aspell',
+    '/usr/lib/*/aspell',
+    '/var/lib/aspell',
+]
+
+def _get_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except (OSError, TypeError):
+        return None
+
+def _get_user_config_dir():
+    try:
+        return enchant.get_user_config_dir()
+    except AttributeError:
+        return None
+
+def _get_dictionary_files(tag):
+    # Return (path, mtime) pairs for the files
+    # that the dictionary could have been loaded from,
+    # including the personal word lists.
+    # The providers don't tell which files they use,
+    # so look for files named after the language in the usual places.
+    tag = tag.replace('-', '_')
+    lang = re.split('[_@]', tag)[0]
+    dirs = []
+    paths = []
+    config_dir = _get_user_config_dir()
+    if config_dir is not None:
+        dirs += [config_dir, os.path.join(config_dir, 'hunspell')]
+        paths += [os.path.join(config_dir, f'{tag}.{ext}') for ext in ('dic', 'exc')]
+    dirs += os.environ.get('DICPATH', '').split(os.pathsep)
+    patterns = [glob.escape(d) for d in dirs if d]
+    patterns += dictionary_dirs
+    for pattern in patterns:
+        paths += sorted(glob.glob(os.path.join(pattern, f'{glob.escape(lang)}[._-]*')))
+    return [(path, _get_mtime(path)) for path in dict.fromkeys(paths)]
+
+def get_dictionary_key(dictionary):
+    if dictionary is None:
+        return __version__
+    provider = dictionary.provider
+    try:
+        enchant_version = enchant.get_enchant_version()
+    except AttributeError:
+        enchant_version = None
+    key = repr((
+        __version__,
+        enchant.__version__,
+        enchant_version,
+        dictionary.tag,
+        provider.name,
+        provider.file,
+        _get_mtime(provider.file),
+        _get_dictionary_files(dictionary.tag),
+    ))
+    return hashlib.sha256(key.encode('UTF-8')).hexdigest()[:32]
+
+def _record_accepted(check, accepted_words):
+    def wrapped_check(word):
+        ok = check(word)
+        if ok:
+            accepted_words.add(word)
+        return ok
+    return wrapped_check
+
+def _suggest_tuple(suggest):
+    # Return immutable suggestions, which are safe to cache.
+    def wrapped_suggest(word):
+        return tuple(suggest(word))
+    return wrapped_suggest
+
+suggestion_cache_size = 1 << 12
+
+class Checker:
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, language='en', *, blacklist=(), camel_case=False, cache_dir=None,
+            known_words=(), lookup_order=lookup_stages, tokenizer='enchant', line_cache_size=0,
+            dict_cache_dir=None, suggest_engine='enchant', suggest_words=(), record_accepted=False):
+        # pylint: disable=too-many-arguments,too-many-locals
+        if sorted(lookup_order) != sorted(lookup_stages):
+            raise ValueError(f'invalid lookup order: {str.join(",", lookup_order)}')
+        if suggest_engine not in {'enchant', 'symspell'}:
+            raise ValueError(f'unknown suggestion engine: {suggest_engine}')
+        self.language = language
+        self.stats = collections.Counter()
+        if tokenizer == 'fast':
+            split_words = text.get_tokenizer(language)
+        elif tokenizer == 'enchant':
+            try:
+                split_words = enchant.tokenize.get_tokenizer(language)
+            except enchant.errors.TokenizerNotFoundError:
+                split_words = enchant.tokenize.get_tokenizer(None)
+        else:
+            raise ValueError(f'unknown tokenizer: {tokenizer}')
+        if camel_case:
+            split_words = text.camel_case_tokenizer(split_words)
+        self.split_words = split_words
+        self.dictionary = dictionary = get_dictionary(language)
+        self.verdict_cache = None
+        self.suggestion_cache = None
+        self.accepted_words = accepted_words = set()
+        if dictionary is None:
+            spellcheck = ''.__gt__  # always returns False
+            suggest = None
+        else:
+            spellcheck = dictionary.check
+            suggest = _suggest_tuple(dictionary.suggest)
+            if cache_dir is not None:
+                self.verdict_cache = cache.VerdictCache(
+                    os.path.join(cache_dir, 'verdicts.sqlite'),
+                    get_dictionary_key(dictionary),
+                    stats=self.stats,
+                )
+                spellcheck = self.verdict_cache.wrap(spellcheck)
+            if cache_dir is not None and suggest_engine == 'enchant':
+                self.suggestion_cache = cache.SuggestionCache(
+                    os.path.join(cache_dir, 'suggestions.sqlite'),
+                    get_dictionary_key(dictionary),
+                    stats=self.stats,
+                )
+                suggest = self.suggestion_cache.wrap(suggest)
+            if record_accepted:
+                # Remember words that the spell-checker accepted,
+                # so that they can be saved as known words.
+                spellcheck = _record_accepted(spellcheck, accepted_words)
+            spellcheck = functools.lru_cache(maxsize=None)(spellcheck)
+            # Suggestions are expensive, but there can be many of them,
+            # so keep only the recently used ones in memory.
+            suggest = functools.lru_cache(maxsize=suggestion_cache_size)(suggest)
+        self.spellcheck = spellcheck
+        self._suggest = suggest
+        self.force_ucs2 = (
+            dictionary is not None and
+            dictionary.provider.name == 'myspell'
+        )
+        self.intdict = intdict.Dictionary(language, cache_dir=dict_cache_dir)
+        self.extdict = extdict.Dictionary(*blacklist)
+        self.known_words = knownwords.read(*known_words)
+        self._suggestions_key = 'suggestions: spellchecker'
+        if suggest_engine == 'symspell':
+            self._suggestions_key = 'suggestions: symspell'
+            self._suggest = self._get_symspell_suggest(suggest_words, cache_dir=dict_cache_dir)
+        self._line_cache_info = None
+        if line_cache_size > 0:
+            # Identical lines have identical findings,
+            # so remember findings for recently seen lines.
+            self.check_line = functools.lru_cache(maxsize=line_cache_size)(self.check_line)
+            self._line_cache_info = (0, 0)
+        # stage name -> (lookup function, verdict if found)
+        stages = {
+            'blacklist': (self.extdict.__contains__, (1, 'blacklist')),
+            'known-words': (self.known_words.__contains__, None),
+            'spellchecker': (spellcheck, None),
+            'whitelist': (self.intdict.is_whitelisted, None),
+        }
+        self._stages = [
+            (f'lookups: {name} hits', *stages[name])
+            for name in lookup_order
+        ]
+
+    def normalize_line(self, line):
+        return text.normalize_line(line, force_ucs2=self.force_ucs2)
+
+    def classify_word(self, word):
+        # Return (certainty, source) of the misspelling,
+        # or None if the word is spelled correctly.
+        stats = self.stats
+        for key, lookup, verdict in self._stages:
+            if lookup(word):
+                stats[key] += 1
+                return verdict
+        stats['lookups: misses'] += 1
+        return 0, 'spellchecker'
+
+    def suggest(self, word):
+        # Return list of suggested corrections for the word.
+        # Corrections from the blacklists take precedence;
+        # asking the spell-checker is much slower.
+        stats = self.stats
+        corrections = self.extdict.get_corrections(word)
+        if corrections:
+            stats['suggestions: blacklist'] += 1
+            return list(corrections)
+        if self._suggest is None:
+            return []
+        stats[self._suggestions_key] += 1
+        return list(self._suggest(word))
+
+    def _get_symspell_suggest(self, paths, *, cache_dir):
+        # Build (or load) the index only when it's needed for the first time.
+        def suggest(word):
+            words = itertools.chain(self.known_words, self.extdict.iter_corrections())
+            index = symspell.get_index(paths, words, cache_dir=cache_dir)
+            self._suggest = index.suggest
+            return self._suggest(word)
+        return suggest
+
+    def find_multiword(self, line, findings):
+        # Return multi-word misspellings
+        # that don't overlap with already found ones.
+        taken = bytearray(len(line))
+        for word, pos, *_ in findings:
+            for i, dummy in enumerate(word, start=pos):
+                taken[i] = True
+        result = []
+        for word, pos in self.intdict.find(line):
+            assert len(word) >= 1
+            for i, dummy in enumerate(word, start=pos):
+                if taken[i]:
+                    break
+            else:
+                result += [(word, pos, 1, 'multi-word')]
+        return result
+
+    def check_line(self, line):  # pylint: disable=method-hidden
+        # Return tuple of (word, column, certainty, source) tuples.
+        # The line must be already normalized.
+        findings = []
+        for word, pos in self.split_words(line):
+            assert len(word) >= 1
+            verdict = self.classify_word(word)
+            if verdict is not None:
+                findings += [(word, pos, *verdict)]
+        findings += self.find_multiword(line, findings)
+        return tuple(findings)
+
+    def check_lines(self, lines):
+        for lineno, line in enumerate(lines, start=1):
+            line = self.normalize_line(line)
+            for word, pos, certainty, source in self.check_line(line):
+                yield Finding(word, line, lineno, pos, certainty, source)
+
+    def check_text(self, s):
+        file = io.StringIO(s, newline=None)
+        return self.check_lines(file)
+
+    def check_file(self, path, *, encoding='UTF-8', errors='replace'):
+        with open(path, 'rt', encoding=encoding, errors=errors) as file:
+            yield from self.check_lines(file)
+
+    def update_stats(self):
+        # Add statistics of the line cache to self.stats.
+        if self._line_cache_info is None:
+            return
+        info = self.check_line.cache_info()
+        [hits, misses] = self._line_cache_info
+        self.stats['line cache hits'] += info.hits - hits
+        self.stats['line cache misses'] += info.misses - misses
+        self._line_cache_info = (info.hits, info.misses)
+
+    def _get_caches(self):
+        return [self.verdict_cache, self.suggestion_cache]
+
+    def take_cache_updates(self):
+        # Return (and forget) the updates of the caches
+        # that haven't been written yet;
+        # another Checker can write them with add_cache_updates().
+        self.update_stats()
+        return [
+            None if word_cache is None else word_cache.take_updates()
+            for word_cache in self._get_caches()
+        ]
+
+    def add_cache_updates(self, updates):
+        for word_cache, cache_updates in zip(self._get_caches(), updates):
+            if word_cache is not None and cache_updates is not None:
+                word_cache.add_updates(cache_updates)
+
+    def flush(self):
+        self.update_stats()
+        if self.verdict_cache is not None:
+            self.verdict_cache.flush()
+        if self.suggestion_cache is not None:
+            self.suggestion_cache.flush()
+
+    def close(self):
+        self.update_stats()
+        if self.verdict_cache is not None:
+            self.verdict_cache.close()
+            self.verdict_cache = None
+        if self.suggestion_cache is not None:
+            self.suggestion_cache.close()
+            self.suggestion_cache = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+__all__ = [
+    'Checker',
+    'Finding',
+    'lookup_stages',
+]
+
+# vim:ts=4 sts=4 sw=4 et
@@ -22,26 +22,46 @@
 the command-line interface
 '''
 
+# pylint: disable=too-many-lines
+
 import argparse
+import collections
+import contextlib
+import copy
 import functools
+import hashlib
 import io
-import re
+import math
+import multiprocessing
+import os
+import shutil
 import signal
+import sqlite3
 import sys
+import tempfile
+import time
 import types
 
 import enchant.tokenize
 
 class lib:
     # pylint: disable=import-outside-toplevel
+    from . import cache
+    from . import checker
     from . import colors
     from . import data
     from . import extdict
     from . import intdict
+    from . import knownwords
+    from . import lines
     from . import pager
+    from . import reader
+    from . import report
+    from . import server
     from . import text
+    from . import version
 
-__version__ = '0.7.11'
+__version__ = lib.version.__version__
 
 class VersionAction(argparse.Action):
 
@@ -83,15 +103,26 @@ def main():
         help='print list of available languages')
     ap.add_argument('--blacklist', metavar='FILE', action='append', default=[],
         help='use misspelling dictionary')
+    ap.add_argument('--compile-blacklist', metavar='FILE',
+        help='compile the --blacklist dictionaries into FILE, then exit')
     ap.add_argument('--camel-case', action='store_true',
         help='split camel-cased compound words')
+    ap.add_argument('--tokenizer', choices=('enchant', 'fast'), default='enchant',
+        help=(
+            '"enchant" = use the Enchant tokenizer (default)\n'
+            '"fast" = use a faster, equivalent regex-based tokenizer\n'
+        )
+    )
     ap.add_argument('--input-encoding', metavar='ENC', default='UTF-8:replace',
         help='assume input encoding ENC (default: "UTF-8:replace")')
     default_output_format = 'color' if sys.stdout.isatty() else 'plain'
-    ap.add_argument('-f', '--output-format', choices=('plain', 'color'), default=default_output_format,
+    output_formats = ('plain', 'color', *lib.report.formats)
+    ap.add_argument('-f', '--output-format', choices=output_formats, default=default_output_format,
         help=(
             '"plain" = use "^" to emphasize words\n'
             '"color" = highlight words in color (default on tty)\n'
+            '"jsonl" = write every misspelling as a JSON object in a separate line\n'
+            '"sarif" = write misspellings in the SARIF format\n'
         )
     )
     ap.add_argument('-r', '--reverse', action='store_true',
@@ -102,28 +133,58 @@ def main():
         help='skip words that have >N instances')
     ap.add_argument('--max-context-width', type=int, metavar='N', default=30,
         help='limit context width to N chars')
+    ap.add_argument('--max-contexts', type=int, metavar='N',
+        help='keep contexts from at most N lines for every word')
+    ap.add_argument('--max-words', type=int, metavar='N',
+        help='print at most N words that occurred in many lines')
+    ap.add_argument('--max-lines', type=int, metavar='N',
+        help='print at most N lines with words that occurred only once')
     ap.add_argument('--suggest', metavar='N', type=int, default=0,
         help='suggest up to N corrections')
+    ap.add_argument('--suggest-engine', choices=('enchant', 'symspell'), default='enchant',
+        help=(
+            '"enchant" = ask the spell-checker for suggestions (default)\n'
+            '"symspell" = suggest similar words from --suggest-words, --known-words\n'
+            'and blacklist corrections\n'
+        )
+    )
+    ap.add_argument('--suggest-words', metavar='FILE', action='append', default=[],
+        help='use word-frequency list for --suggest-engine=symspell')
+    ap.add_argument('-j', '--jobs', metavar='N', type=int, default=1,
+        help='check up to N files in parallel (default: 1)')
+    ap.add_argument('--two-phase', action='store_true',
+        help='tokenize all files first, then check unique words in one batch')
+    ap.add_argument('--lazy-context', action='store_true',
+        help="don't keep lines in memory; re-read them when printing")
+    ap.add_argument('--cache-dir', metavar='DIR',
+        help='cache spell-checking results in DIR')
+    ap.add_argument('--line-cache-size', metavar='N', type=int, default=10000,
+        help='remember findings for up to N recently seen lines (default: 10000)')
+    ap.add_argument('--known-words', metavar='FILE', action='append', default=[],
+        help='assume that words from the list are spelled correctly')
+    ap.add_argument('--save-known-words', metavar='FILE',
+        help='save words that were spelled correctly to FILE')
+    ap.add_argument('--lookup-order', metavar='STAGES', type=lookup_order,
+        default=lib.checker.lookup_stages,
+        help=(
+            'look up words in STAGES in this order\n'
+            f'(default: "{str.join(",", lib.checker.lookup_stages)}")'
+        )
+    )
+    ap.add_argument('--stats', action='store_true',
+        help='print statistics to stderr')
+    ap.add_argument('--profile-rules', action='store_true',
+        help='profile multi-word misspelling rules instead of spell-checking')
+    ap.add_argument('--serve', metavar='SOCKET',
+        help='run as a server listening on Unix socket SOCKET')
+    ap.add_argument('--connect', metavar='SOCKET',
+        help='send files to the server listening on Unix socket SOCKET')
     ap.add_argument('--debug-dict', action='store_true', help=argparse.SUPPRESS)
     ap.add_argument('--traceback', action='store_true', help=argparse.SUPPRESS)
     options = ap.parse_args()
     sys.stdout.reconfigure(encoding='UTF-8')
-    try:
-        split_words = enchant.tokenize.get_tokenizer(options.language)
-    except enchant.errors.TokenizerNotFoundError:
-        split_words = enchant.tokenize.get_tokenizer(None)
-    if options.camel_case:
-        split_words = lib.text.camel_case_tokenizer(split_words)
-    if options.language == 'und':
-        dictionary = None
-        spellcheck = ''.__gt__  # always returns False
-        options.suggest = 0
-    else:
-        dictionary = enchant.Dict(options.language)
-        spellcheck = functools.lru_cache(maxsize=None)(
-            dictionary.check
-        )
     if options.debug_dict:
+        dictionary = lib.checker.get_dictionary(options.language)
         if dictionary is None:
             dictvars = {}
         else:
@@ -131,121 +192,775 @@ def main():
         for key, value in sorted(dictvars):
             print(f'{key} = {value!r}')
         sys.exit(0)
-    intdict = lib.intdict.Dictionary(options.language)
-    extdict = lib.extdict.Dictionary(*options.blacklist)
-    misspellings = lib.data.Misspellings()
+    if options.compile_blacklist is not None:
+        sys.exit(compile_blacklist(ap, options))
+    if options.jobs < 1:
+        ap.error('--jobs must be a positive integer')
+    if options.line_cache_size < 0:
+        ap.error('--line-cache-size must be a non-negative integer')
+    if options.max_contexts is not None and options.max_contexts < 1:
+        ap.error('--max-contexts must be a positive integer')
+    if options.max_words is not None and options.max_words < 0:
+        ap.error('--max-words must be a non-negative integer')
+    if options.max_lines is not None and options.max_lines < 0:
+        ap.error('--max-lines must be a non-negative integer')
+    if options.serve is not None:
+        serve(options)
+        sys.exit(0)
+    if options.connect is not None:
+        if options.output_format in lib.report.formats:
+            ap.error(f'--connect: output format not supported: {options.output_format}')
+        sys.exit(run_client(ap, options))
+    if options.profile_rules:
+        sys.exit(profile_rules(ap, options))
+    if options.lazy_context and options.output_format not in lib.report.formats:
+        [encoding, _] = get_input_encoding(options)
+        try:
+            lib.lines.Source('-', encoding=encoding, errors='strict')
+        except LookupError as exc:
+            ap.error(f'--lazy-context: {exc}')
+        if '-' in options.files:
+            # Standard input can't be re-read,
+            # so spool it to a temporary file.
+            stdin_copy = tempfile.NamedTemporaryFile(prefix='mwic.')  # pylint: disable=consider-using-with
+            shutil.copyfileobj(sys.stdin.buffer, stdin_copy)
+            stdin_copy.flush()
+            options.files = [
+                stdin_copy.name if path == '-' else path
+                for path in options.files
+            ]
+    ctxt = open_context(ap, options)
+    misspellings = ctxt.misspellings
+    if options.output_format in lib.report.formats:
+        errors = write_misspellings(ctxt, options.files)
+    elif options.two_phase:
+        errors = spellcheck_paths_two_phase(ctxt, options.files)
+    elif options.jobs > 1 and len(options.files) > 1:
+        errors = spellcheck_paths_parallel(ctxt, options.files)
+    else:
+        errors = spellcheck_paths(ctxt, options.files)
+    rc = print_errors(ap, options, errors)
+    if ctxt.findings_cache is not None:
+        ctxt.findings_cache.close()
+    if options.save_known_words is not None:
+        save_known_words(ap, ctxt)
+    if misspellings:
+        raw_cc = options.output_format == 'color'
+        try:
+            with lib.pager.autopager(raw_control_chars=raw_cc):
+                print_misspellings(ctxt)
+        except lib.pager.Error:
+            if options.traceback:
+                raise
+            msg = f'{ap.prog}: pager failed'
+            print(msg, file=sys.stderr)
+            rc = 1
+    # (Suggestions are computed while printing misspellings,
+    # so close the checker and print statistics only afterwards.)
+    ctxt.checker.close()
+    if options.stats:
+        print_stats(ctxt.stats)
+    sys.exit(rc)
+
+def print_errors(ap, options, errors):
+    rc = 0
+    for path, exc in errors:
+        if options.traceback:
+            raise exc
+        msg = f'{ap.prog}: {path}: {exc.strerror}'
+        print(msg, file=sys.stderr)
+        rc = 1
+    return rc
+
+def compile_blacklist(ap, options):
+    path = options.compile_blacklist
+    try:
+        blacklist = lib.extdict.Dictionary(*options.blacklist)
+    except OSError as exc:
+        return print_errors(ap, options, [(exc.filename, exc)])
+    try:
+        blacklist.save(path)
+    except OSError as exc:
+        return print_errors(ap, options, [(path, exc)])
+    return 0
+
+def lookup_order(s):
+    order = tuple(s.split(','))
+    if sorted(order) != sorted(lib.checker.lookup_stages):
+        stages = str.join(', ', lib.checker.lookup_stages)
+        raise argparse.ArgumentTypeError(f'must be a permutation of: {stages}')
+    return order
+
+def save_known_words(ap, ctxt):
+    checker = ctxt.checker
+    path = ctxt.options.save_known_words
+    try:
+        lib.knownwords.write(path, checker.known_words | checker.accepted_words)
+    except OSError as exc:
+        if ctxt.options.traceback:
+            raise
+        msg = f'{ap.prog}: {path}: {exc.strerror}'
+        print(msg, file=sys.stderr)
+        sys.exit(1)
+
+def get_findings_cache_key(ctxt):
+    options = ctxt.options
+    checker = ctxt.checker
+    paths = [checker.intdict.path, *options.blacklist, *options.known_words]
+    key = repr((
+        lib.checker.get_dictionary_key(checker.dictionary),
+        # the format of the cached data:
+        lib.cache.file_digest(lib.data.__file__),
+        options.language,
+        [lib.cache.file_digest(path) for path in paths if path is not None],
+        len(options.blacklist),
+        options.lookup_order,
+        options.camel_case,
+        options.tokenizer,
+        options.input_encoding,
+        options.lazy_context,
+        options.max_contexts,
+        options.limit,
+    ))
+    return hashlib.sha256(key.encode('UTF-8')).hexdigest()
+
+def new_misspellings(options):
+    limit = options.limit
+    if math.isinf(limit):
+        limit = None
+    return lib.data.Misspellings(max_contexts=options.max_contexts, limit=limit)
+
+def get_context(options):
+    checker = lib.checker.Checker(options.language,
+        blacklist=options.blacklist,
+        camel_case=options.camel_case,
+        cache_dir=options.cache_dir,
+        known_words=options.known_words,
+        lookup_order=options.lookup_order,
+        tokenizer=options.tokenizer,
+        line_cache_size=options.line_cache_size,
+        dict_cache_dir=options.cache_dir or lib.cache.get_default_dir(),
+        suggest_engine=options.suggest_engine,
+        suggest_words=options.suggest_words,
+        record_accepted=options.save_known_words is not None,
+    )
+    ctxt = types.SimpleNamespace(
+        checker=checker,
+        findings_cache=None,
+        stats=checker.stats,
+        misspellings=new_misspellings(options),
+        options=options,
+        suggestions={},
+        pending_suggestions=None,
+    )
+    if options.cache_dir is not None:
+        ctxt.findings_cache = lib.cache.FindingsCache(
+            os.path.join(options.cache_dir, 'findings.sqlite'),
+            get_findings_cache_key(ctxt),
+            stats=ctxt.stats,
+        )
+    return ctxt
+
+def open_context(ap, options):
+    # Like get_context(), but exit with an error message
+    # if a file (such as a cache) can't be opened.
+    try:
+        return get_context(options)
+    except (OSError, sqlite3.Error) as exc:
+        if options.traceback:
+            raise
+        if isinstance(exc, OSError):
+            msg = f'{ap.prog}: {exc.filename or options.cache_dir}: {exc.strerror}'
+        else:
+            msg = f'{ap.prog}: {options.cache_dir}: {exc}'
+        print(msg, file=sys.stderr)
+        sys.exit(1)
+
+def get_input_encoding(options):
     encoding = options.input_encoding
     enc_errors = 'strict'
     if ':' in encoding:
         [encoding, enc_errors] = encoding.rsplit(':', 1)
-    ctxt = types.SimpleNamespace(
-        dictionary=dictionary,
-        intdict=intdict,
-        extdict=extdict,
-        split_words=split_words,
-        spellcheck=spellcheck,
-        misspellings=misspellings,
-        options=options,
+    return encoding, enc_errors
+
+def open_input(path, *, data=None):
+    if data is not None:
+        return io.BytesIO(data)
+    if path == '-':
+        return sys.stdin.buffer
+    return open(path, 'rb')  # pylint: disable=consider-using-with
+
+def _read_lines(file, lines):
+    with file:
+        for line in lines:
+            yield line, line
+
+def get_source(ctxt, path):
+    if not ctxt.options.lazy_context:
+        return None
+    [encoding, enc_errors] = get_input_encoding(ctxt.options)
+    return lib.lines.Source(path,
+        encoding=encoding,
+        errors=enc_errors,
+        force_ucs2=ctxt.checker.force_ucs2,
+    )
+
+def read_lines(ctxt, path, *, data=None):
+    # Return iterator over (line, key) pairs,
+    # where key is what should be stored in Misspellings.
+    source = get_source(ctxt, path)
+    if source is not None:
+        return source.open()
+    [encoding, enc_errors] = get_input_encoding(ctxt.options)
+    file = open_input(path, data=data)
+    lines = lib.reader.read_lines(file,
+        encoding=encoding,
+        errors=enc_errors,
+        force_ucs2=ctxt.checker.force_ucs2,
     )
+    return _read_lines(file, lines)
+
+def spellcheck_path(ctxt, path, *, data=None):
+    cache = ctxt.findings_cache
+    if cache is None or path == '-':
+        lines = read_lines(ctxt, path, data=data)
+        spellcheck_lines(ctxt, lines)
+        return
+    key = cache.get_key(path)
+    source = get_source(ctxt, path)
+    partial = cache.get(key, source=source)
+    if partial is None:
+        lines = read_lines(ctxt, path)
+        misspellings = ctxt.misspellings
+        ctxt.misspellings = partial = new_misspellings(ctxt.options)
+        try:
+            spellcheck_lines(ctxt, lines)
+        finally:
+            ctxt.misspellings = misspellings
+        cache.put(key, partial)
+    ctxt.misspellings.update(partial)
+
+def spellcheck_paths(ctxt, paths):
+    for path in paths:
+        try:
+            spellcheck_path(ctxt, path)
+        except OSError as exc:
+            yield path, exc
+
+_worker_ctxt = None
+
+def _init_worker(options):
+    global _worker_ctxt  # pylint: disable=global-statement
+    _worker_ctxt = get_context(options)
+
+def _spellcheck_path_in_worker(job):
+    [path, data] = job
+    ctxt = _worker_ctxt
+    ctxt.misspellings = new_misspellings(ctxt.options)
+    try:
+        spellcheck_path(ctxt, path, data=data)
+    except OSError as exc:
+        return path, None, None, exc
+    return path, ctxt.misspellings, _take_worker_state(ctxt), None
+
+def _take_worker_state(ctxt):
+    # Return (and reset) statistics, accepted words and cache updates
+    # accumulated in the worker process.
+    # The cache updates are written by the main process, all at once,
+    # so that the workers don't wait for each other's database commits.
+    checker = ctxt.checker
+    cache_updates = checker.take_cache_updates()
+    findings_cache_updates = None
+    if ctxt.findings_cache is not None:
+        findings_cache_updates = ctxt.findings_cache.take_updates()
+    stats = ctxt.stats.copy()
+    ctxt.stats.clear()
+    accepted_words = set()
+    if ctxt.options.save_known_words is not None:
+        accepted_words = checker.accepted_words.copy()
+        checker.accepted_words.clear()
+    return stats, accepted_words, cache_updates, findings_cache_updates
+
+def _merge_worker_state(ctxt, state):
+    [stats, accepted_words, cache_updates, findings_cache_updates] = state
+    ctxt.stats.update(stats)
+    ctxt.checker.accepted_words.update(accepted_words)
+    ctxt.checker.add_cache_updates(cache_updates)
+    if findings_cache_updates is not None:
+        ctxt.findings_cache.add_updates(findings_cache_updates)
+
+def _suggest_in_worker(word):
+    ctxt = _worker_ctxt
+    suggestions = ctxt.checker.suggest(word)
+    return word, suggestions, _take_worker_state(ctxt)
+
+def suggest_parallel(ctxt, words):
+    # Every worker process has its own spell-checker dictionary.
+    # The results are yielded in the order of the words.
+    with multiprocessing.Pool(ctxt.options.jobs, initializer=_init_worker, initargs=(ctxt.options,)) as pool:
+        for word, suggestions, state in pool.imap(_suggest_in_worker, words):
+            _merge_worker_state(ctxt, state)
+            yield word, suggestions
+
+def _get_jobs(paths):
+    # Standard input can't be read in worker processes,
+    # so read it here.
+    for path in paths:
+        data = None
+        if path == '-':
+            data = sys.stdin.buffer.read()
+        yield path, data
+
+def spellcheck_paths_parallel(ctxt, paths):
+    # Every worker process builds its own dictionaries
+    # and returns partial results for one file at a time.
+    # The results are merged in the order of the paths,
+    # so that the output is the same as in the serial mode.
+    with multiprocessing.Pool(ctxt.options.jobs, initializer=_init_worker, initargs=(ctxt.options,)) as pool:
+        for path, misspellings, state, exc in pool.imap(_spellcheck_path_in_worker, _get_jobs(paths)):
+            if exc is not None:
+                yield path, exc
+            else:
+                ctxt.misspellings.update(misspellings)
+                _merge_worker_state(ctxt, state)
+
+def normalized_lines(ctxt, file):
+    normalize_line = ctxt.checker.normalize_line
+    for line in file:
+        yield normalize_line(line)
+
+def spellcheck_lines(ctxt, lines):
+    check_line = ctxt.checker.check_line
+    add = ctxt.misspellings.add
+    for line, key in lines:
+        for word, pos, certainty, _ in check_line(line):
+            add(word, key, pos, certainty)
+
+def _classify_words_in_worker(words):
+    ctxt = _worker_ctxt
+    verdicts = [ctxt.checker.classify_word(word) for word in words]
+    return verdicts, _take_worker_state(ctxt)
+
+def spellcheck_paths_two_phase(ctxt, paths):
+    # Phase 1: tokenize unique lines,
+    # and remember where each unique word occurs.
+    # (Checking the same line twice wouldn't change the results.)
+    options = ctxt.options
+    stats = ctxt.stats
+    lines = {}
+    keys = []
+    ntokens = []
+    vocabulary = collections.defaultdict(list)
+    for path in paths:
+        try:
+            path_lines = read_lines(ctxt, path)
+        except OSError as exc:
+            yield path, exc
+            continue
+        for line, key in path_lines:
+            stats['lines'] += 1
+            i = lines.get(line)
+            if i is None:
+                i = lines[line] = len(lines)
+                keys += [key]
+                n = 0
+                for word, pos in ctxt.checker.split_words(line):
+                    assert len(word) >= 1
+                    vocabulary[word] += [(i, pos)]
+                    n += 1
+                ntokens += [n]
+            stats['tokens'] += ntokens[i]
+    stats['unique lines'] += len(lines)
+    stats['unique words'] += len(vocabulary)
+    # Phase 2: check the vocabulary in one batch.
+    words = list(vocabulary)
+    if options.jobs > 1 and len(words) > 1:
+        chunk_size = -(-len(words) // (options.jobs * 4))
+        chunks = [
+            words[i:i + chunk_size]
+            for i in range(0, len(words), chunk_size)
+        ]
+        verdicts = []
+        with multiprocessing.Pool(options.jobs, initializer=_init_worker, initargs=(options,)) as pool:
+            for chunk_verdicts, state in pool.imap(_classify_words_in_worker, chunks):
+                verdicts += chunk_verdicts
+                _merge_worker_state(ctxt, state)
+    else:
+        verdicts = [ctxt.checker.classify_word(word) for word in words]
+    # Phase 3: resolve positions of the rejected words only.
+    findings = collections.defaultdict(list)
+    for word, verdict in zip(words, verdicts):
+        if verdict is None:
+            continue
+        for i, pos in vocabulary[word]:
+            findings[i] += [(word, pos, *verdict)]
+    del vocabulary
+    add = ctxt.misspellings.add
+    for i, line in enumerate(lines):
+        line_findings = findings.get(i, [])
+        line_findings += ctxt.checker.find_multiword(line, line_findings)
+        for word, pos, certainty, _ in line_findings:
+            add(word, keys[i], pos, certainty)
+
+def find_misspellings(ctxt, path, *, data=None):
+    # Yield (line, pos, misspelling) triples from the file; see lib.report.
+    [encoding, enc_errors] = get_input_encoding(ctxt.options)
+    file = open_input(path, data=data)
+    lines = lib.reader.read_lines(file,
+        encoding=encoding,
+        errors=enc_errors,
+        normalize=False,
+    )
+    with file:
+        yield from lib.report.find_misspellings(ctxt.checker, path, lines)
+
+def _find_misspellings_in_worker(job):
+    [path, data] = job
+    ctxt = _worker_ctxt
+    try:
+        findings = list(find_misspellings(ctxt, path, data=data))
+    except OSError as exc:
+        return path, None, None, exc
+    return path, findings, _take_worker_state(ctxt), None
+
+def find_misspellings_in_paths(ctxt, paths, errors):
+    # Yield (line, pos, misspelling) triples from the files, in the order of the paths;
+    # append (path, exception) pairs to errors.
+    options = ctxt.options
+    if options.jobs > 1 and len(paths) > 1:
+        with multiprocessing.Pool(options.jobs, initializer=_init_worker, initargs=(options,)) as pool:
+            for path, findings, state, exc in pool.imap(_find_misspellings_in_worker, _get_jobs(paths)):
+                if exc is not None:
+                    errors.append((path, exc))
+                else:
+                    _merge_worker_state(ctxt, state)
+                    yield from findings
+        return
+    for path in paths:
+        try:
+            yield from find_misspellings(ctxt, path)
+        except OSError as exc:
+            errors.append((path, exc))
+
+def write_misspellings(ctxt, paths):
+    # Write misspellings in a machine-readable format,
+    # without grouping or sorting them.
+    # Return list of (path, exception) pairs.
+    options = ctxt.options
+    errors = []
+    findings = find_misspellings_in_paths(ctxt, paths, errors)
+    if not math.isinf(options.limit):
+        findings = lib.report.apply_limit(findings, options.limit)
+    suggest = functools.lru_cache(maxsize=None)(lambda word: get_suggestions(ctxt, word)[:options.suggest])
+    writer_class = lib.report.formats[options.output_format]
+    with writer_class(sys.stdout, version=__version__) as writer:
+        for _, _, misspelling in findings:
+            if options.suggest > 0:
+                misspelling['suggestions'] = suggest(misspelling['word'])
+            writer.write(misspelling)
+    return errors
+
+# options that clients can set for each request:
+request_option_names = [
+    'language',
+    'blacklist',
+    'camel_case',
+    'output_format',
+    'reverse',
+    'compact',
+    'limit',
+    'max_context_width',
+    'max_contexts',
+    'max_words',
+    'max_lines',
+    'suggest',
+]
+
+def _get_server_context(contexts, options):
+    # Keep one context per (language, blacklist set, tokenizer options),
+    # so that the dictionaries are loaded only once.
+    # When a blacklist changes, the old context is replaced.
+    mtimes = []
+    for path in options.blacklist:
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = None
+        mtimes += [mtime]
+    key = (options.language, tuple(options.blacklist), options.camel_case)
+    [ctxt_mtimes, ctxt] = contexts.get(key, (None, None))
+    if ctxt is not None and ctxt_mtimes != mtimes:
+        del contexts[key]
+        close_context(ctxt)
+        ctxt = None
+    if ctxt is None:
+        ctxt = get_context(options)
+        ctxt.flush_time = time.monotonic()
+        contexts[key] = (mtimes, ctxt)
+    return ctxt
+
+def close_context(ctxt):
+    ctxt.checker.close()
+    if ctxt.findings_cache is not None:
+        ctxt.findings_cache.close()
+
+server_flush_interval = 10  # seconds
+
+def _handle_request(server_options, contexts, request):
+    options = copy.copy(server_options)
+    for name, value in request.get('options', {}).items():
+        if name in request_option_names:
+            setattr(options, name, value)
+    ctxt = _get_server_context(contexts, options)
+    ctxt.options = options
+    ctxt.misspellings = new_misspellings(options)
+    ctxt.stats.clear()
+    response = {}
+    if request.get('findings'):
+        response['findings'] = [
+            dict(finding._asdict(), file=path)
+            for path, text in request['files']
+            for finding in ctxt.checker.check_text(text)
+        ]
+    else:
+        for _, text in request['files']:
+            file = io.StringIO(text)
+            lines = normalized_lines(ctxt, file)
+            spellcheck_lines(ctxt, _read_lines(file, lines))
+        with contextlib.redirect_stdout(io.StringIO()) as file:
+            if ctxt.misspellings:
+                print_misspellings(ctxt)
+        response['report'] = file.getvalue()
+    # Committing the caches after every request would be slow,
+    # so do it only once in a while, and when the server stops.
+    ctxt.checker.update_stats()
+    now = time.monotonic()
+    if now - ctxt.flush_time >= server_flush_interval:
+        ctxt.checker.flush()
+        ctxt.flush_time = now
+    response['stats'] = dict(ctxt.stats)
+    return response
+
+def serve(options):
+    # Don't die when a client disconnects early:
+    signal.signal(signal.SIGPIPE, signal.SIG_IGN)
+    options.lazy_context = False
+    contexts = {}
+    try:
+        lib.server.serve(
+            options.serve,
+            functools.partial(_handle_request, options, contexts),
+        )
+    finally:
+        for _, ctxt in contexts.values():
+            close_context(ctxt)
+
+def run_client(ap, options):
+    [encoding, enc_errors] = get_input_encoding(options)
     rc = 0
+    files = []
     for path in options.files:
-        if path == '-':
-            file = io.TextIOWrapper(
-                sys.stdin.buffer,
+        try:
+            file = io.TextIOWrapper(open_input(path),
                 encoding=encoding,
                 errors=enc_errors,
             )
-        else:
-            try:
-                file = open(  # pylint: disable=consider-using-with
-                    path, 'rt',
-                    encoding=encoding,
-                    errors=enc_errors,
-                )
-            except OSError as exc:
-                if options.traceback:
-                    raise
-                msg = f'{ap.prog}: {path}: {exc.strerror}'
-                print(msg, file=sys.stderr)
-                rc = 1
-                continue
+        except OSError as exc:
+            if options.traceback:
+                raise
+            msg = f'{ap.prog}: {path}: {exc.strerror}'
+            print(msg, file=sys.stderr)
+            rc = 1
+            continue
         with file:
-            spellcheck_file(ctxt, file)
-    if not misspellings:
-        sys.exit(rc)
+            files += [[path, file.read()]]
+    options.blacklist = [os.path.abspath(path) for path in options.blacklist]
+    request = {
+        'options': {name: getattr(options, name) for name in request_option_names},
+        'files': files,
+    }
+    try:
+        response = lib.server.request(options.connect, request)
+    except (OSError, lib.server.Error) as exc:
+        if options.traceback:
+            raise
+        reason = exc.strerror if isinstance(exc, OSError) else exc
+        msg = f'{ap.prog}: {options.connect}: {reason}'
+        print(msg, file=sys.stderr)
+        return 1
+    if options.stats:
+        print_stats(response['stats'])
+    report = response['report']
+    if not report:
+        return rc
     raw_cc = options.output_format == 'color'
     try:
         with lib.pager.autopager(raw_control_chars=raw_cc):
-            print_misspellings(ctxt)
+            sys.stdout.write(report)
     except lib.pager.Error:
         if options.traceback:
             raise
         msg = f'{ap.prog}: pager failed'
         print(msg, file=sys.stderr)
         rc = 1
-    sys.exit(rc)
+    return rc
+
+def profile_rules(ap, options):
+    ctxt = open_context(ap, options)
+    errors = []
+    def lines():
+        for path in options.files:
+            try:
+                for n, (line, _) in enumerate(read_lines(ctxt, path), 1):
+                    yield f'{path}:{n}', line
+            except OSError as exc:
+                errors.append((path, exc))
+    profiles = ctxt.checker.intdict.profile(lines())
+    close_context(ctxt)
+    rc = print_errors(ap, options, errors)
+    print_rule_profiles(profiles)
+    return rc
+
+def print_rule_profiles(profiles):
+    profiles = [profile for profile in profiles if profile.lines]
+    profiles.sort(key=lambda profile: -profile.time)
+    for profile in profiles:
+        print(
+            f'{profile.time * 1000:10.3f} ms',
+            f'{profile.matches:6} matches',
+            f'{profile.lines:8} lines',
+            f' {profile.location}: {profile.source}',
+        )
+        [worst_time, worst_key] = profile.worst
+        if worst_key is not None:
+            print(f'{worst_time * 1000:10.3f} ms  (worst line: {worst_key})')
 
-def spellcheck_file(ctxt, file):
-    force_ucs2 = (
-        ctxt.dictionary is not None and
-        ctxt.dictionary.provider.name == 'myspell'
+def print_stats(stats):
+    lookups = sum(
+        value for key, value in stats.items()
+        if key.startswith('lookups: ')
     )
-    for line in file:
-        if force_ucs2:
-            # https://github.com/rfk/pyenchant/issues/58
-            line = re.sub(r'[^\0-\uFFFF]', '\uFFFD', line)
-        line = line.strip()
-        line = line.expandtabs()
-        taken = bytearray(len(line))
-        for word, pos in ctxt.split_words(line):
-            assert len(word) >= 1
-            if word in ctxt.extdict:
-                certainty = 1
-            elif ctxt.spellcheck(word):
-                continue
-            elif ctxt.intdict.is_whitelisted(word):
-                continue
-            else:
-                certainty = 0
-            for i, dummy in enumerate(word, start=pos):
-                taken[i] = True
-            ctxt.misspellings.add(word, line, pos, certainty)
-        for word, pos in ctxt.intdict.find(line):
-            assert len(word) >= 1
-            for i, dummy in enumerate(word, start=pos):
-                if taken[i]:
-                    break
-            else:
-                ctxt.misspellings.add(word, line, pos, 1)
+    for key, value in sorted(stats.items()):
+        total = None
+        if key.startswith('lookups: '):
+            total = lookups
+        elif key.endswith(' hits'):
+            total = value + stats.get(key[:-5] + ' misses', 0)
+        if total:
+            print(f'{key}: {value} ({value / total:.1%})', file=sys.stderr)
+        else:
+            print(f'{key}: {value}', file=sys.stderr)
 
 def print_misspellings(ctxt):
     rare_misspellings = lib.data.Misspellings()
-    for word, occurrences in ctxt.misspellings.sorted_words():
+    for word, occurrences in ctxt.misspellings.words():
         if len(occurrences) == 1:
             [(word, line, positions)] = occurrences
             for pos, certainty in positions.items():
                 rare_misspellings.add(word, line, pos, certainty)
     ctxt.rare_misspellings = rare_misspellings
-    if ctxt.options.reverse:
-        print_common_misspellings(ctxt)
-        print_rare_misspellings(ctxt)
+    if ctxt.options.suggest > 0:
+        prefetch_suggestions(ctxt)
+    try:
+        if ctxt.options.reverse:
+            print_common_misspellings(ctxt)
+            print_rare_misspellings(ctxt)
+        else:
+            print_rare_misspellings(ctxt)
+            print_common_misspellings(ctxt)
+    finally:
+        if ctxt.pending_suggestions is not None:
+            ctxt.pending_suggestions.close()
+        ctxt.pending_suggestions = None
+        ctxt.suggestions = {}
+
+def get_rare_misspellings(ctxt):
+    # Return (line, occurrences) pairs that print_rare_misspellings() prints.
+    options = ctxt.options
+    def is_reported(item):
+        [_, occurrences] = item
+        return any(
+            len(positions) <= options.limit
+            for _, _, positions in occurrences
+        )
+    return ctxt.rare_misspellings.sorted_lines(
+        reverse=options.reverse,
+        n=options.max_lines,
+        predicate=is_reported,
+    )
+
+def get_common_misspellings(ctxt):
+    # Return (word, occurrences) pairs that print_common_misspellings() prints.
+    options = ctxt.options
+    def is_reported(item):
+        [_, occurrences] = item
+        return len(occurrences) > 1 and lib.report.is_within_limit(occurrences, options.limit)
+    return ctxt.misspellings.sorted_words(
+        reverse=options.reverse,
+        n=options.max_words,
+        predicate=is_reported,
+    )
+
+def get_reported_words(ctxt):
+    # Return words that print_misspellings() prints, in the same order.
+    options = ctxt.options
+    rare_words = [
+        word
+        for _, occurrences in get_rare_misspellings(ctxt)
+        for word, _, positions in sorted(occurrences)
+        if len(positions) <= options.limit
+    ]
+    common_words = [
+        word
+        for word, _ in get_common_misspellings(ctxt)
+    ]
+    if options.reverse:
+        words = common_words + rare_words
     else:
-        print_rare_misspellings(ctxt)
-        print_common_misspellings(ctxt)
+        words = rare_words + common_words
+    return list(dict.fromkeys(words))
+
+def prefetch_suggestions(ctxt):
+    # Asking the spell-checker for suggestions is slow,
+    # so with --jobs, compute them in worker processes
+    # ahead of printing.
+    checker = ctxt.checker
+    if ctxt.options.jobs <= 1 or checker.dictionary is None:
+        return
+    if ctxt.options.suggest_engine != 'enchant':
+        return
+    words = [
+        word for word in get_reported_words(ctxt)
+        if not checker.extdict.get_corrections(word)
+    ]
+    if len(words) <= 1:
+        return
+    ctxt.suggestions = dict.fromkeys(words)
+    ctxt.pending_suggestions = suggest_parallel(ctxt, words)
+
+def get_suggestions(ctxt, word):
+    suggestions = ctxt.suggestions
+    if word not in suggestions:
+        return ctxt.checker.suggest(word)
+    while suggestions[word] is None:
+        [other_word, other_suggestions] = next(ctxt.pending_suggestions)
+        suggestions[other_word] = other_suggestions
+    return suggestions[word]
+
+def format_suggestions(ctxt, word):
+    n = ctxt.options.suggest
+    if n <= 0:
+        return ''
+    suggestions = get_suggestions(ctxt, word)[:n]
+    if not suggestions:
+        return ''
+    suggestions = str.join(', ', suggestions)
+    return f' ({suggestions})'
 
 def print_common_misspellings(ctxt):
     options = ctxt.options
-    for word, occurrences in ctxt.misspellings.sorted_words(reverse=options.reverse):
-        if len(occurrences) == 1:
-            continue
-        if occurrences.count() > options.limit:
-            continue
-        extra = ''
-        if options.suggest > 0:
-            suggestions = ctxt.dictionary.suggest(word)[:options.suggest]
-            if suggestions:
-                suggestions = str.join(', ', suggestions)
-                extra = f' ({suggestions})'
+    for word, occurrences in get_common_misspellings(ctxt):
+        extra = format_suggestions(ctxt, word)
         print(word + extra + ':')
         highlight_color = 'error' if occurrences.certainty > 0 else 'warn'
         occurrences = [
@@ -276,22 +991,18 @@ def print_common_misspellings(ctxt):
 def print_rare_misspellings(ctxt):
     options = ctxt.options
     use_color = options.output_format == 'color'
-    for line, occurrences in ctxt.rare_misspellings.sorted_lines(reverse=options.reverse):
+    for line, occurrences in get_rare_misspellings(ctxt):
+        line = str(line)
         header = []
         underline = bytearray(b' ' * len(line))
-        for word, line, positions in sorted(occurrences):  # pylint: disable=redefined-outer-name
+        for word, _, positions in sorted(occurrences):
             if use_color and (max(positions.values()) > 0):
                 underline_char = b'!'
             else:
                 underline_char = b'^'
             if len(positions) > options.limit:
                 continue
-            extra = ''
-            if options.suggest > 0:
-                suggestions = ctxt.dictionary.suggest(word)[:options.suggest]
-                if suggestions:
-                    suggestions = str.join(', ', suggestions)
-                    extra = f' ({suggestions})'
+            extra = format_suggestions(ctxt, word)
             header += [word + extra]
             for x in positions:
                 underline[x : x + len(word)] = underline_char * len(word)
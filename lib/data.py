@@ -22,35 +22,62 @@
 collecting misspelling data
 '''
 
-import collections
+import hashlib
+import heapq
 import sys
 
+# Every finding is stored as a single integer key,
+# with the line ID, the word ID and the position packed together:
+_pos_bits = 32
+_id_bits = 32
+_pos_mask = (1 << _pos_bits) - 1
+_id_mask = (1 << _id_bits) - 1
+
+def _get_digest(line):
+    # Return integer digest of the line
+    # that is stable across processes.
+    if isinstance(line, str):
+        digest = hashlib.blake2b(line.encode('UTF-8', 'surrogatepass'), digest_size=8).digest()
+    else:
+        digest = line.digest
+    return int.from_bytes(digest[:8], 'little')
+
 class Occurrences:
 
-    def __init__(self):
-        self._data = collections.defaultdict(dict)
-        self.certainty = 0
+    # View of the findings that share the same word (or the same line).
+    # The findings that were dropped by Misspellings(max_contexts=...)
+    # are included only in count() and len().
 
-    def add(self, word, line, pos, certainty):
-        if isinstance(pos, int):
-            self._data[(word, line)][pos] = certainty
-        else:
-            for p in pos:
-                self._data[(word, line)][p] = certainty
-        self.certainty = max(self.certainty, certainty)
+    __slots__ = ('_owner', '_keys', 'certainty', '_dropped')
+
+    def __init__(self, owner, keys, certainty, dropped=None):
+        self._owner = owner
+        self._keys = keys
+        self.certainty = certainty
+        self._dropped = dropped
 
     def count(self):
-        return sum(
-            len(positions)
-            for positions in self._data.values()
-        )
+        n = len(self._keys)
+        if self._dropped is not None:
+            n += self._dropped.count
+        return n
 
     def __len__(self):
-        return len(self._data)
+        n = len({key >> _pos_bits for key in self._keys})
+        if self._dropped is not None:
+            n += self._dropped.lines
+        return n
 
     def __iter__(self):
-        for (word, line), positions in self._data.items():
-            yield word, line, positions
+        owner = self._owner
+        findings = owner._findings  # pylint: disable=protected-access
+        words = owner._words  # pylint: disable=protected-access
+        lines = owner._lines  # pylint: disable=protected-access
+        pairs = {}
+        for key in self._keys:
+            pairs.setdefault(key >> _pos_bits, {})[key & _pos_mask] = findings[key]
+        for pair, positions in pairs.items():
+            yield words[pair & _id_mask], lines[pair >> _id_bits], positions
 
     @staticmethod
     def _sorting_key(item):
@@ -58,7 +85,8 @@ class Occurrences:
         return (rcontext, lcontext[::-1], word)
 
     def _context(self):
-        for (word, line), positions in self._data.items():
+        for word, line, positions in self:
+            line = str(line)
             for pos in positions:
                 lcontext = line[:pos]
                 rcontext = line[pos + len(word):]
@@ -67,17 +95,264 @@ class Occurrences:
     def sorted_context(self):
         return sorted(self._context(), key=self._sorting_key)
 
-class Misspellings:
+class _Dropped:
+
+    # Summary of the findings of a word
+    # that were dropped by Misspellings(max_contexts=...).
+    # Identical lines have identical findings,
+    # so only the number of findings in every line is kept,
+    # indexed by the line digest,
+    # so that findings from repeated lines are not counted twice.
+    # The positions are remembered only for the most recently dropped line,
+    # whose findings could be still coming.
+
+    __slots__ = ('counts', 'count', 'certainty', 'last_digest', 'last_positions')
 
     def __init__(self):
-        self._word_index = collections.defaultdict(Occurrences)
-        self._line_index = collections.defaultdict(Occurrences)
+        self.counts = {}
+        self.count = 0
+        self.certainty = 0
+        self.last_digest = None
+        self.last_positions = None
+
+    @property
+    def lines(self):
+        return len(self.counts)
+
+    def add(self, digest, pos):
+        counts = self.counts
+        if digest != self.last_digest:
+            self.last_digest = digest
+            self.last_positions = None if digest in counts else set()
+        positions = self.last_positions
+        if positions is None:
+            # findings from a repeated line, which were already counted
+            return
+        positions.update(pos)
+        self.count += len(positions) - counts.get(digest, 0)
+        counts[digest] = len(positions)
+
+    def update(self, other, *, exclude):
+        # Add counts from the other summary,
+        # except for the lines that are already counted
+        # or whose digests are in exclude.
+        counts = self.counts
+        for digest, n in other.counts.items():
+            if digest not in counts and digest not in exclude:
+                counts[digest] = n
+                self.count += n
+        self.certainty = max(self.certainty, other.certainty)
+
+class Misspellings:
+    # pylint: disable=too-many-instance-attributes
+
+    # Words and lines are given integer IDs.
+    # Each finding is stored only once,
+    # as a packed integer key mapped to the certainty;
+    # the word and line indexes are lists of these keys.
+    # The maximum certainty is kept up to date for every word and line,
+    # so that the sorting keys are cheap to compute.
+    #
+    # If max_contexts is not None,
+    # only findings from the first max_contexts lines of every word are kept;
+    # the other ones are only counted.
+    #
+    # If limit is not None,
+    # words that occurred more than limit times
+    # in more than one line are forgotten:
+    # their findings are not kept or counted,
+    # and they are omitted from words().
+    # (Such words are never printed,
+    # but words that occurred in only one line can affect
+    # how the lines are sorted.)
+
+    def __init__(self, *, max_contexts=None, limit=None):
+        self.max_contexts = max_contexts
+        self.limit = limit
+        self._words = []
+        self._word_ids = {}
+        self._word_index = []
+        self._word_certainty = []
+        self._word_lines = []
+        self._lines = []
+        self._line_ids = {}
+        self._line_index = []
+        self._line_certainty = []
+        self._findings = {}
+        self._dropped = {}
+        self._forgotten = set()
+
+    def __getstate__(self):
+        # The IDs and indexes can be recomputed cheaply,
+        # so don't pickle them.
+        forgotten = {i: self._word_certainty[i] for i in self._forgotten}
+        return (self.max_contexts, self.limit, self._words, self._lines, self._findings, self._dropped, forgotten)
+
+    def __setstate__(self, state):
+        [self.max_contexts, self.limit, words, lines, findings, self._dropped, forgotten] = state
+        self._words = words
+        self._word_ids = {word: i for i, word in enumerate(words)}
+        self._word_index = [[] for _ in words]
+        self._word_certainty = [0] * len(words)
+        self._word_lines = [0] * len(words)
+        self._lines = lines
+        self._line_ids = {line: i for i, line in enumerate(lines)}
+        self._line_index = [[] for _ in lines]
+        self._line_certainty = [0] * len(lines)
+        self._findings = findings
+        for key, certainty in findings.items():
+            pair = key >> _pos_bits
+            word_id = pair & _id_mask
+            line_id = pair >> _id_bits
+            self._word_index[word_id].append(key)
+            self._line_index[line_id].append(key)
+            self._update_certainty(word_id, line_id, certainty)
+        if self.max_contexts is not None:
+            for word_id, keys in enumerate(self._word_index):
+                self._word_lines[word_id] = len({key >> _pos_bits for key in keys})
+        for word_id, dropped in self._dropped.items():
+            self._word_certainty[word_id] = max(self._word_certainty[word_id], dropped.certainty)
+        for word_id, certainty in forgotten.items():
+            self._word_certainty[word_id] = certainty
+        self._forgotten = set(forgotten)
+
+    def _update_certainty(self, word_id, line_id, certainty):
+        word_certainty = self._word_certainty
+        line_certainty = self._line_certainty
+        word_certainty[word_id] = max(word_certainty[word_id], certainty)
+        line_certainty[line_id] = max(line_certainty[line_id], certainty)
+
+    def _get_word_id(self, word):
+        i = self._word_ids.get(word)
+        if i is None:
+            word = sys.intern(word)
+            i = self._word_ids[word] = len(self._words)
+            self._words += [word]
+            self._word_index += [[]]
+            self._word_certainty += [0]
+            self._word_lines += [0]
+        return i
+
+    def _get_line_id(self, line):
+        i = self._line_ids.get(line)
+        if i is None:
+            if isinstance(line, str):
+                line = sys.intern(line)
+            i = self._line_ids[line] = len(self._lines)
+            self._lines += [line]
+            self._line_index += [[]]
+            self._line_certainty += [0]
+        return i
+
+    def _has_pair(self, word_id, line_id):
+        pair = (line_id << _id_bits) | word_id
+        # The most recently added finding is the most likely match:
+        return any(key >> _pos_bits == pair for key in reversed(self._word_index[word_id]))
+
+    def _get_dropped(self, word_id, certainty):
+        dropped = self._dropped.get(word_id)
+        if dropped is None:
+            dropped = self._dropped[word_id] = _Dropped()
+        dropped.certainty = max(dropped.certainty, certainty)
+        self._word_certainty[word_id] = max(self._word_certainty[word_id], certainty)
+        return dropped
+
+    def _drop(self, word_id, line, pos, certainty):
+        dropped = self._get_dropped(word_id, certainty)
+        dropped.add(_get_digest(line), pos)
+
+    def _get_kept_digests(self, word_id):
+        # Return digests of the lines in which findings of the word are kept.
+        return {
+            _get_digest(self._lines[key >> _pos_bits >> _id_bits])
+            for key in self._word_index[word_id]
+        }
+
+    def _check_limit(self, word_id):
+        keys = self._word_index[word_id]
+        dropped = self._dropped.get(word_id)
+        count = len(keys)
+        if dropped is not None:
+            count += dropped.count
+        if count <= self.limit:
+            return
+        if dropped is None:
+            pair = keys[0] >> _pos_bits
+            if all(key >> _pos_bits == pair for key in keys):
+                return
+        self._forget(word_id)
+
+    def _forget(self, word_id):
+        # Remove all findings of the word,
+        # and remember only that it was forgotten
+        # (and its certainty, which is kept up to date).
+        self._forgotten.add(word_id)
+        self._dropped.pop(word_id, None)
+        keys = self._word_index[word_id]
+        pairs = dict.fromkeys(key >> _pos_bits for key in keys)
+        findings = self._findings
+        for key in keys:
+            del findings[key]
+            self._line_index[(key >> _pos_bits) >> _id_bits].remove(key)
+        for pair in pairs:
+            line_id = pair >> _id_bits
+            line_keys = self._line_index[line_id]
+            self._line_certainty[line_id] = max((findings[key] for key in line_keys), default=0)
+        self._word_index[word_id] = []
 
     def add(self, word, line, pos, certainty):
-        word = sys.intern(word)
-        line = sys.intern(line)
-        self._word_index[word].add(word, line, pos, certainty)
-        self._line_index[line].add(word, line, pos, certainty)
+        if isinstance(pos, int):
+            pos = [pos]
+        word_id = self._get_word_id(word)
+        if word_id in self._forgotten:
+            self._word_certainty[word_id] = max(self._word_certainty[word_id], certainty)
+            return
+        if self.max_contexts is not None:
+            line_id = self._line_ids.get(line)
+            if line_id is None or not self._has_pair(word_id, line_id):
+                if self._word_lines[word_id] >= self.max_contexts:
+                    self._drop(word_id, line, pos, certainty)
+                    return
+                self._word_lines[word_id] += 1
+        line_id = self._get_line_id(line)
+        pair = ((line_id << _id_bits) | word_id) << _pos_bits
+        findings = self._findings
+        for p in pos:
+            key = pair | p
+            if key not in findings:
+                self._word_index[word_id].append(key)
+                self._line_index[line_id].append(key)
+            findings[key] = certainty
+        self._update_certainty(word_id, line_id, certainty)
+        if self.limit is not None:
+            self._check_limit(word_id)
+
+    def update(self, other):
+        for word, occurrences in other.words():
+            for _, line, positions in occurrences:
+                for pos, certainty in positions.items():
+                    self.add(word, line, pos, certainty)
+            other_dropped = occurrences._dropped  # pylint: disable=protected-access
+            if other_dropped is None:
+                continue
+            word_id = self._get_word_id(word)
+            if word_id in self._forgotten:
+                self._word_certainty[word_id] = max(self._word_certainty[word_id], other_dropped.certainty)
+                continue
+            dropped = self._get_dropped(word_id, other_dropped.certainty)
+            # Findings from lines that are kept here are not dropped:
+            dropped.update(other_dropped, exclude=self._get_kept_digests(word_id))
+            if self.limit is not None:
+                self._check_limit(word_id)
+        # A word that was forgotten in the other object
+        # occurred too many times in more than one line,
+        # so it would have been forgotten here, too:
+        for other_word_id in other._forgotten:  # pylint: disable=protected-access
+            word_id = self._get_word_id(other._words[other_word_id])  # pylint: disable=protected-access
+            certainty = other._word_certainty[other_word_id]  # pylint: disable=protected-access
+            self._word_certainty[word_id] = max(self._word_certainty[word_id], certainty)
+            if word_id not in self._forgotten:
+                self._forget(word_id)
 
     @staticmethod
     def _sorting_key(*, reverse=False):
@@ -89,24 +364,48 @@ class Misspellings:
             return (
                 sign * -occurrences.certainty,
                 sign * occurrences.count(),
-                s
+                str(s)
             )
         return k
 
     def __bool__(self):
-        return bool(self._word_index)
-
-    def sorted_words(self, *, reverse=False):
-        return sorted(
-            self._word_index.items(),
-            key=self._sorting_key(reverse=reverse)
-        )
-
-    def sorted_lines(self, *, reverse=False):
-        return sorted(
-            self._line_index.items(),
-            key=self._sorting_key(reverse=reverse)
-        )
+        return bool(self._findings or self._dropped)
+
+    def words(self):
+        # Return iterator over (word, occurrences) pairs, in no particular order.
+        # Forgotten words are omitted.
+        words = zip(self._words, self._word_index, self._word_certainty)
+        forgotten = self._forgotten
+        for word_id, (word, keys, certainty) in enumerate(words):
+            if word_id in forgotten:
+                continue
+            yield word, Occurrences(self, keys, certainty, self._dropped.get(word_id))
+
+    def lines(self):
+        # Return iterator over (line, occurrences) pairs, in no particular order.
+        for line, keys, certainty in zip(self._lines, self._line_index, self._line_certainty):
+            if keys:
+                yield line, Occurrences(self, keys, certainty)
+
+    def _sorted(self, items, *, reverse, n, predicate):
+        if predicate is not None:
+            items = filter(predicate, items)
+        key = self._sorting_key(reverse=reverse)
+        if n is None:
+            return sorted(items, key=key)
+        # Selecting the first n items is cheaper than sorting all of them,
+        # and gives the same result as sorted(...)[:n].
+        return heapq.nsmallest(n, items, key=key)
+
+    def sorted_words(self, *, reverse=False, n=None, predicate=None):
+        # Return list of (word, occurrences) pairs,
+        # for which predicate (if any) is true,
+        # but at most n (if not None) of them.
+        return self._sorted(self.words(), reverse=reverse, n=n, predicate=predicate)
+
+    def sorted_lines(self, *, reverse=False, n=None, predicate=None):
+        # Return list of (line, occurrences) pairs; see sorted_words().
+        return self._sorted(self.lines(), reverse=reverse, n=n, predicate=predicate)
 
 __all__ = [
     'Misspellings',
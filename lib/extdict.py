@@ -28,9 +28,21 @@ Supported dictionary formats:
 + codespell <https://github.com/codespell-project/codespell/raw/master/codespell_lib/data/dictionary.txt>
 + kde-spellcheck <https://github.com/KDE/kde-dev-scripts/raw/master/kde-spellcheck.pl>
 + plain word list
++ compiled blacklist (see Dictionary.save())
 '''
 
+import functools
+import io
+import itertools
+import mmap
+import os
 import re
+import struct
+import sys
+import tempfile
+import zlib
+
+from . import wordset
 
 separators = {
     '||',  # Lintian
@@ -48,6 +60,8 @@ def case_variants(word, correction=None):
         yield word.upper()
 
 def parse_line(line):
+    # Return (word, correction),
+    # where correction is None if the line doesn't have one.
     word = line
     for sep in separators:
         try:
@@ -58,24 +72,239 @@ def parse_line(line):
             break
     else:
         correction = None
-    return case_variants(word, correction)
+    return word, correction
+
+def parse_correction(correction):
+    # Return tuple of corrections.
+    # In codespell,
+    # "fix1, fix2," means that there are multiple possible fixes,
+    # and "fix, reason" means that the fix shouldn't be applied automatically.
+    items = [item.strip() for item in correction.split(',')]
+    if len(items) > 1:
+        del items[-1]
+    return tuple(item for item in items if item)
+
+class Table:
+
+    # Compiled blacklist format:
+    # + magic;
+    # + number of words n,
+    #   and number of hash table slots m
+    #   (32-bit little-endian integers);
+    # + n + 1 offsets of the words (ditto),
+    #   relative to the end of the hash table;
+    # + n + 1 offsets of the values (ditto),
+    #   relative to the end of the words;
+    # + hash table with m slots (ditto),
+    #   containing 0 for empty slots, or i + 1 for the i-th word,
+    #   with linear probing;
+    # + UTF-8-encoded words, sorted bytewise;
+    # + UTF-8-encoded values (newline-separated corrections).
+    # The file is mapped into memory,
+    # so loading it is cheap,
+    # and the pages are shared between processes.
+
+    magic = b'\0mwic-blacklist\2'
+    _header = struct.Struct('<II')
+
+    def __init__(self, file):
+        self._data = data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        pos = len(self.magic) + self._header.size
+        if len(data) < pos:
+            raise self._error(file)
+        [n, m] = self._header.unpack_from(data, len(self.magic))
+        self._base = pos + 4 * (2 * (n + 1) + m)
+        if m <= n or len(data) < self._base:
+            raise self._error(file)
+        self._offsets = _uint_array(data, pos, n + 1)
+        self._value_offsets = _uint_array(data, pos + 4 * (n + 1), n + 1)
+        self._slots = _uint_array(data, pos + 4 * 2 * (n + 1), m)
+        self._value_base = self._base + self._offsets[n]
+        if len(data) != self._value_base + self._value_offsets[n]:
+            raise self._error(file)
+
+    @staticmethod
+    def _error(file):
+        return ValueError(f'{file.name}: malformed compiled blacklist')
+
+    def _find(self, word):
+        # Return index of the word, or -1 if it's not in the table.
+        key = word.encode('UTF-8', 'surrogatepass')
+        data = self._data
+        base = self._base
+        offsets = self._offsets
+        slots = self._slots
+        m = len(slots)
+        h = zlib.crc32(key) % m
+        for _ in itertools.repeat(None, m):
+            i = slots[h]
+            if i == 0:
+                return -1
+            if data[base + offsets[i - 1]:base + offsets[i]] == key:
+                return i - 1
+            h = (h + 1) % m
+        return -1  # no coverage
+
+    def __contains__(self, word):
+        return self._find(word) >= 0
+
+    def get(self, word):
+        # Return value for the word, or None if it's not in the table.
+        i = self._find(word)
+        if i < 0:
+            return None
+        return self._get_value(i)
+
+    def _get_value(self, i):
+        base = self._value_base
+        offsets = self._value_offsets
+        return self._data[base + offsets[i]:base + offsets[i + 1]].decode('UTF-8')
+
+    def items(self):
+        base = self._base
+        offsets = self._offsets
+        for i in range(len(offsets) - 1):
+            word = self._data[base + offsets[i]:base + offsets[i + 1]].decode('UTF-8')
+            yield word, self._get_value(i)
+
+    @classmethod
+    def write(cls, file, items):
+        items = sorted(
+            (word.encode('UTF-8'), value.encode('UTF-8'))
+            for word, value in items
+        )
+        n = len(items)
+        # Keep the hash table at most half full,
+        # so that probe sequences are short.
+        m = 2 * n + 1
+        slots = [0] * m
+        for i, (key, _) in enumerate(items, start=1):
+            h = zlib.crc32(key) % m
+            while slots[h]:
+                h = (h + 1) % m
+            slots[h] = i
+        offsets = [0]
+        value_offsets = [0]
+        for key, value in items:
+            offsets += [offsets[-1] + len(key)]
+            value_offsets += [value_offsets[-1] + len(value)]
+        file.write(cls.magic)
+        file.write(cls._header.pack(n, m))
+        file.write(struct.pack(f'<{n + 1}I', *offsets))
+        file.write(struct.pack(f'<{n + 1}I', *value_offsets))
+        file.write(struct.pack(f'<{m}I', *slots))
+        for key, _ in items:
+            file.write(key)
+        for _, value in items:
+            file.write(value)
+
+def _uint_array(data, pos, n):
+    # Return sequence of n 32-bit little-endian integers,
+    # without copying the data if possible.
+    view = memoryview(data)[pos:pos + 4 * n]
+    if sys.byteorder == 'little' and struct.calcsize('I') == 4:
+        return view.cast('I')
+    return struct.unpack(f'<{n}I', view)  # no coverage
+
+def _get_umask():
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
 
 class Dictionary:
 
     def __init__(self, *paths):
-        self._dict = set()
+        self._dict = wordset.WordSet()
+        self._corrections = {}
+        self._tables = []
         for path in paths:
             self._read(path)
+        if self._tables:
+            # Looking up words in compiled tables is slower than in a set,
+            # but words tend to repeat.
+            self._in_tables = functools.lru_cache(maxsize=0x10000)(self._in_tables)
 
     def __contains__(self, word):
-        return word in self._dict
+        return word in self._dict or self._in_tables(word)
+
+    def _in_tables(self, word):  # pylint: disable=method-hidden
+        for table in self._tables:
+            if word in table:
+                return True
+        return False
 
     def _add(self, word):
         self._dict.add(word)
 
+    def _add_corrections(self, word, corrections):
+        if corrections:
+            old_corrections = self._corrections.get(word, ())
+            self._corrections[word] = tuple(dict.fromkeys(old_corrections + corrections))
+
+    def _get_corrections(self, word):
+        corrections = self._corrections.get(word, ())
+        for table in self._tables:
+            value = table.get(word)
+            if value:
+                corrections += tuple(value.split('\n'))
+        return tuple(dict.fromkeys(corrections))
+
+    def get_corrections(self, word):
+        # Return tuple of corrections for the blacklisted word.
+        if word not in self:
+            return ()
+        corrections = self._get_corrections(word)
+        if corrections:
+            return corrections
+        # The word may be a case variant of a lower-case entry:
+        key = word.lower()
+        if word == key:
+            return ()
+        corrections = self._get_corrections(key)
+        if word == key.upper():
+            return tuple(correction.upper() for correction in corrections)
+        if word == key.title():
+            return tuple(correction[:1].upper() + correction[1:] for correction in corrections)
+        return ()
+
+    def iter_corrections(self):
+        for corrections in self._corrections.values():
+            yield from corrections
+        for table in self._tables:
+            for _, value in table.items():
+                if value:
+                    yield from value.split('\n')
+
     def _read(self, path):
-        with open(path, 'rt', encoding='UTF-8') as file:
-            self._read_fp(file)
+        with open(path, 'rb') as file:
+            magic = Table.magic
+            if file.peek(len(magic))[:len(magic)] == magic:
+                self._tables += [Table(file)]
+                return
+            with io.TextIOWrapper(file, encoding='UTF-8') as text_file:
+                self._read_fp(text_file)
+
+    def save(self, path):
+        # Write the dictionary in the compiled format.
+        # Replace the file atomically,
+        # because other processes may have the old one mapped into memory.
+        words = set(self._dict)
+        for table in self._tables:
+            words.update(word for word, _ in table.items())
+        items = (
+            (word, str.join('\n', self._get_corrections(word)))
+            for word in words
+        )
+        dirname = os.path.dirname(path) or os.curdir
+        with tempfile.NamedTemporaryFile(dir=dirname, prefix='.mwic.', delete=False) as file:
+            try:
+                Table.write(file, items)
+                file.flush()
+                os.chmod(file.name, 0o666 & ~_get_umask())
+                os.replace(file.name, path)
+            except BaseException:
+                os.unlink(file.name)
+                raise
 
     def _read_fp(self, file):
         add = self._add
@@ -90,8 +319,11 @@ class Dictionary:
             line = line.strip()
             if not line:
                 continue
-            for word in parse_line(line):
-                add(word)
+            [word, correction] = parse_line(line)
+            for variant in case_variants(word, correction):
+                add(variant)
+            if correction is not None:
+                self._add_corrections(word, parse_correction(correction))
 
     def _read_fp_kde(self, file):
         add = self._add
@@ -104,7 +336,11 @@ class Dictionary:
             line = line.split()
             if line:
                 add(line[0])
+                self._add_corrections(line[0], tuple(line[1:2]))
 
-__all__ = ['Dictionary']
+__all__ = [
+    'Dictionary',
+    'Table',
+]
 
 # vim:ts=4 sts=4 sw=4 et
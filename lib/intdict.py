@@ -25,10 +25,19 @@ internal dictionary, which can contain:
   but are not present in standard dictionaries.
 '''
 
+import collections
+import functools
+import hashlib
+import io
 import os
+import time
 
 import regex as re
 
+from . import cache
+from . import literals
+from . import wordset
+
 basedir = os.path.normpath(os.path.join(
     os.path.dirname(__file__),
     os.path.pardir,
@@ -81,69 +90,202 @@ class Macros:
             assert False  # no coverage
         return self._regex.sub(replace, s)
 
+Rule = collections.namedtuple('Rule', ['regex', 'lineno', 'source'])
+
+class RuleProfile:
+
+    def __init__(self, location, source):
+        self.location = location
+        self.source = source
+        self.lines = 0
+        self.matches = 0
+        self.time = 0.0
+        self.worst = (0.0, None)
+
+    def add(self, key, elapsed, matches):
+        self.lines += 1
+        self.matches += matches
+        self.time += elapsed
+        if elapsed > self.worst[0]:
+            self.worst = (elapsed, key)
+
 class Dictionary:
 
-    def __init__(self, lang):
-        self._whitelist = set()
-        regexes = []
+    def __init__(self, lang, *, prefilter=True, cache_dir=None):
+        self.path = None
+        self._whitelist = wordset.WordSet()
+        self._rules = []
+        required_literals = []
         lang = lang.lower().replace('_', '-')
         while True:
             path = os.path.join(datadir, lang)
             try:
-                file = open(path, 'rt', encoding='UTF-8')  # pylint: disable=consider-using-with
+                file = open(path, 'rb')  # pylint: disable=consider-using-with
             except FileNotFoundError:
                 [lang, *suffix] = lang.rsplit('-', 1)
                 if suffix:
                     continue
                 else:
                     break
-            macros = Macros()
-            n = None  # hi, pylint
-            def error(reason):  # no coverage
-                return SyntaxError(reason, (file.name, n, 1, whole_line))
+            self.path = path
             with file:
-                for n, line in enumerate(file, 1):
-                    whole_line = line
-                    if line.startswith('#'):
-                        continue
-                    line = line.split()
-                    if not line:
-                        continue
-                    if line[0] == '*':
-                        [word] = line[1:]
-                        self._whitelist.add(word)
-                        self._whitelist.add(word.upper())
-                        self._whitelist.add(word.title())
-                    elif line[0][0] == '@':
-                        if (len(line) >= 4) and (line[0] == '@define') and (line[2] == '='):
-                            (_, name, _, *definition) = line
-                            definition = str.join(r'\s+', definition)
-                            definition = fr'(?:{definition})'
-                            try:
-                                re.compile(definition)
-                            except re.error as exc:  # no coverage
-                                raise error(exc)
-                            try:
-                                macros[name] = macros.expand(definition)  # pylint: disable=unsubscriptable-object
-                            except KeyError:  # no coverage
-                                raise error(f'duplicate macro definition: {name}')
-                        else:
-                            raise error('malformed @-command')  # no coverage
-                    else:
-                        regex = str.join(r'\s+', line)
-                        regex = macros.expand(regex)
-                        try:
-                            re.compile(regex)
-                        except re.error as exc:  # no coverage
-                            raise error(exc)
-                        regexes += [regex]
+                data = file.read()
+            [self._whitelist, self._rules, required_literals] = self._load(data, cache_dir=cache_dir)
             break
-        if regexes:
-            regex = str.join('|', regexes)
-            regex = fr'\b(?:(?i){regex})\b'
-            self._find = re.compile(regex).finditer
-        else:
+        if not self._rules:
             self._find = _find_nothing
+        elif prefilter:
+            self._init_prefilter(required_literals)
+            self._find = self._find_prefiltered
+        else:
+            self._find = self._find_lazily
+
+    def _load(self, data, *, cache_dir):
+        # Parsing the dictionary is relatively slow,
+        # so keep the results in a cache, if available.
+        if cache_dir is None:
+            return self._parse(data)
+        cache_path = os.path.join(cache_dir, f'intdict-{os.path.basename(self.path)}.pickle')
+        key = repr((
+            # the code that parses the dictionary:
+            cache.file_digest(__file__),
+            cache.file_digest(literals.__file__),
+            cache.file_digest(wordset.__file__),
+            re.__version__,  # pylint: disable=no-member
+            # the dictionary itself:
+            hashlib.sha256(data).hexdigest(),
+        ))
+        result = cache.load_object(cache_path, key, classes=[wordset.WordSet, Rule])
+        if result is None:
+            result = self._parse(data)
+            cache.store_object(cache_path, key, result)
+        return result
+
+    def _parse(self, data):
+        # Return (whitelist, rules, required literals for each rule).
+        whitelist = wordset.WordSet()
+        rules = []
+        macros = Macros()
+        n = None  # hi, pylint
+        def error(reason):  # no coverage
+            return SyntaxError(reason, (self.path, n, 1, whole_line))
+        file = io.StringIO(data.decode('UTF-8'), newline=None)
+        for n, line in enumerate(file, 1):
+            whole_line = line
+            if line.startswith('#'):
+                continue
+            line = line.split()
+            if not line:
+                continue
+            if line[0] == '*':
+                [word] = line[1:]
+                whitelist.add(word)
+                whitelist.add(word.upper())
+                whitelist.add(word.title())
+            elif line[0][0] == '@':
+                if (len(line) >= 4) and (line[0] == '@define') and (line[2] == '='):
+                    (_, name, _, *definition) = line
+                    definition = str.join(r'\s+', definition)
+                    definition = fr'(?:{definition})'
+                    try:
+                        re.compile(definition)
+                    except re.error as exc:  # no coverage
+                        raise error(exc)
+                    try:
+                        macros[name] = macros.expand(definition)  # pylint: disable=unsubscriptable-object
+                    except KeyError:  # no coverage
+                        raise error(f'duplicate macro definition: {name}')
+                else:
+                    raise error('malformed @-command')  # no coverage
+            else:
+                regex = str.join(r'\s+', line)
+                regex = macros.expand(regex)
+                try:
+                    re.compile(regex)
+                except re.error as exc:  # no coverage
+                    raise error(exc)
+                rules += [Rule(regex, n, str.join(' ', line))]
+        required_literals = [
+            literals.required_literals(rule.regex)
+            for rule in rules
+        ]
+        return whitelist, rules, required_literals
+
+    @staticmethod
+    def _compile(regex):
+        regex = fr'\b(?:(?i){regex})\b'
+        return re.compile(regex)
+
+    def _init_prefilter(self, required_literals):
+        # Most of the regexes can match only if the line contains
+        # one of a few literal strings.
+        # Index the regexes by these literals,
+        # so that only the regexes that have a chance to match are run.
+        unfiltered = set()
+        index = collections.defaultdict(set)
+        for i, required in enumerate(required_literals):
+            if not required:
+                unfiltered.add(i)
+            for literal in required:
+                index[literal].add(i)
+        self._unfiltered = frozenset(unfiltered)
+        self._index = sorted(index.items())
+        # Compile the regexes only when they are needed:
+        self._get_regex = functools.lru_cache(maxsize=None)(
+            lambda i: self._compile(self._rules[i].regex)
+        )
+
+    def _find_lazily(self, s):
+        # Compile the combined regex only when it's needed for the first time.
+        regex = str.join('|', (rule.regex for rule in self._rules))
+        self._find = self._compile(regex).finditer
+        return self._find(s)
+
+    def _get_candidates(self, s):
+        # Return indices of the regexes that can match s.
+        folded = literals.fold(s)
+        if len(folded) != len(s):
+            # Some characters were folded to more than one character
+            # (such as "İ" to "i̇"),
+            # but the regexes could match them as single characters.
+            return set(range(len(self._rules)))
+        indices = set(self._unfiltered)
+        for literal, literal_indices in self._index:
+            if literal in folded:
+                indices |= literal_indices
+        return indices
+
+    def _find_prefiltered(self, s):
+        indices = self._get_candidates(s)
+        if not indices:
+            return ()
+        if len(indices) == 1:
+            [i] = indices
+            return self._get_regex(i).finditer(s)
+        return self._finditer_merged(s, sorted(indices))
+
+    def _finditer_merged(self, s, indices):
+        # Emulate finditer() of the alternation of the regexes:
+        # the leftmost match wins;
+        # if there are many matches at the same position,
+        # the first regex (in the dictionary order) wins;
+        # the search continues where the previous match ended.
+        searches = [self._get_regex(i).search for i in indices]
+        pending = [search(s) for search in searches]
+        while True:
+            best = None
+            for match in pending:
+                if match is not None and (best is None or match.start() < best.start()):
+                    best = match
+            if best is None:
+                return
+            yield best
+            # (Don't loop forever on empty matches.)
+            pos = max(best.end(), best.start() + 1)
+            pending = [
+                search(s, pos) if match is not None and match.start() < pos else match
+                for match, search in zip(pending, searches)
+            ]
 
     def find(self, s):
         for match in self._find(s):
@@ -152,6 +294,33 @@ class Dictionary:
     def is_whitelisted(self, word):
         return word in self._whitelist
 
-__all__ = ['Dictionary']
+    def profile(self, lines):
+        # Run every rule separately on (key, line) pairs;
+        # return list of RuleProfile objects, in the dictionary order.
+        # Only the lines that the prefilter lets through are tried,
+        # so the timings reflect what the rules cost in practice.
+        location = os.path.relpath(self.path or '', basedir)
+        profiles = [
+            RuleProfile(f'{location}:{rule.lineno}', rule.source)
+            for rule in self._rules
+        ]
+        regexes = [self._compile(rule.regex) for rule in self._rules]
+        prefiltered = self._find == self._find_prefiltered  # pylint: disable=comparison-with-callable
+        timer = time.perf_counter
+        all_indices = range(len(self._rules))
+        for key, s in lines:
+            indices = self._get_candidates(s) if prefiltered else all_indices
+            for i in indices:
+                start = timer()
+                matches = sum(1 for _ in regexes[i].finditer(s))
+                elapsed = timer() - start
+                profiles[i].add(key, elapsed, matches)
+        return profiles
+
+__all__ = [
+    'Dictionary',
+    'Rule',
+    'RuleProfile',
+]
 
 # vim:ts=4 sts=4 sw=4 et
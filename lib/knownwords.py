@@ -0,0 +1,51 @@
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+'''
+known-good word lists
+
+A known-good word list is a plain newline-separated list of words
+that are spelled correctly.
+Lines starting with "#" are ignored.
+'''
+
+def read(*paths):
+    words = set()
+    for path in paths:
+        with open(path, 'rt', encoding='UTF-8') as file:
+            for line in file:
+                if line[:1] == '#':
+                    continue
+                line = line.strip()
+                if line:
+                    words.add(line)
+    return frozenset(words)
+
+def write(path, words):
+    with open(path, 'wt', encoding='UTF-8') as file:
+        for word in sorted(words):
+            print(word, file=file)
+
+__all__ = [
+    'read',
+    'write',
+]
+
+# vim:ts=4 sts=4 sw=4 et
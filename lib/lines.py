@@ -0,0 +1,116 @@
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+'''
+lines that are loaded lazily from files
+'''
+
+import codecs
+import functools
+import hashlib
+import mmap
+
+from . import text
+
+def _split(chunk, encoding, errors):
+    # Emulate universal newlines mode of text files:
+    # "\r\n" and "\r" are line terminators, too.
+    s = chunk.decode(encoding, errors)
+    s = s.replace('\r\n', '\n').replace('\r', '\n')
+    lines = s.split('\n')
+    if lines[-1] == '':
+        del lines[-1]
+    return lines
+
+@functools.lru_cache(maxsize=64)
+def _mmap(path):
+    with open(path, 'rb') as file:
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+class Source:
+
+    def __init__(self, path, *, encoding, errors, force_ucs2=False):
+        self.bom = None
+        if codecs.lookup(encoding).name == 'utf-8-sig':
+            # Skip the BOM at the beginning of the file;
+            # the rest is plain UTF-8.
+            self.bom = codecs.BOM_UTF8
+            encoding = 'UTF-8'
+        if '\n'.encode(encoding) != b'\n':
+            raise LookupError(f'{encoding}: encoding is not ASCII-compatible')
+        self.path = path
+        self.encoding = encoding
+        self.errors = errors
+        self.force_ucs2 = force_ucs2
+
+    def open(self):
+        file = open(self.path, 'rb')  # pylint: disable=consider-using-with
+        return self._read(file)
+
+    def _read(self, file):
+        offset = 0
+        with file:
+            for chunk in file:
+                if offset == 0 and self.bom is not None and chunk.startswith(self.bom):
+                    offset = len(self.bom)
+                    chunk = chunk[offset:]
+                lines = _split(chunk, self.encoding, self.errors)
+                for i, line in enumerate(lines):
+                    line = text.normalize_line(line, force_ucs2=self.force_ucs2)
+                    yield line, LazyLine(self, offset, len(chunk), i, line)
+                offset += len(chunk)
+
+    def read_line(self, offset, size, index):
+        chunk = _mmap(self.path)[offset:offset + size]
+        line = _split(chunk, self.encoding, self.errors)[index]
+        return text.normalize_line(line, force_ucs2=self.force_ucs2)
+
+class LazyLine:
+
+    __slots__ = ('source', 'offset', 'size', 'index', '_digest')
+
+    def __init__(self, source, offset, size, index, line):
+        self.source = source
+        self.offset = offset
+        self.size = size
+        self.index = index
+        self._digest = hashlib.blake2b(line.encode('UTF-8', 'surrogatepass'), digest_size=16).digest()
+
+    def __eq__(self, other):
+        if isinstance(other, LazyLine):
+            return self._digest == other._digest
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self._digest)
+
+    @property
+    def digest(self):
+        return self._digest
+
+    def __str__(self):
+        return self.source.read_line(self.offset, self.size, self.index)
+
+__all__ = [
+    'LazyLine',
+    'Source',
+]
+
+# vim:ts=4 sts=4 sw=4 et
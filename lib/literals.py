@@ -0,0 +1,310 @@
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+'''
+required literals of regular expressions
+
+required_literals() returns a set of strings,
+such that every match of the regular expression
+(when matching case-insensitively)
+contains at least one of them as a substring.
+Both the strings and the text must be normalized with fold()
+before looking for the substrings.
+If fold() changed the length of the text,
+the substrings can't be relied on.
+
+Only the subset of the syntax that is used in the internal dictionaries
+is understood; for anything else, an empty set (meaning "no requirement")
+is returned.
+'''
+
+import functools
+
+import regex as re
+
+max_set_size = 64
+max_class_size = 8
+
+_match_repeat = re.compile(r'[{](\d*)(?:,(\d*))?[}]').match
+_match_flags = re.compile(r'[a-z]*(?:-[a-z]+)?([:)])').match
+
+class _Unsupported(Exception):
+    pass
+
+class _Info:
+
+    # If exact is not None, it's the set of all strings the expression can match.
+    # Otherwise:
+    # - every match starts with one of the strings in prefix,
+    # - every match ends with one of the strings in suffix,
+    # - every match contains one of the strings in req.
+    # A set containing the empty string carries no information.
+
+    def __init__(self, *, exact=None, prefix=frozenset({''}), suffix=frozenset({''}), req=frozenset({''})):
+        self.exact = exact
+        if exact is not None:
+            prefix = suffix = req = exact
+        self.prefix = prefix
+        self.suffix = suffix
+        self.req = req
+
+_any = _Info()
+_empty = _Info(exact=frozenset({''}))
+
+def _product(xs, ys):
+    if len(xs) * len(ys) > max_set_size:
+        return None
+    return frozenset(x + y for x in xs for y in ys)
+
+def _best(*sets):
+    # Pick the most selective set:
+    # the one whose shortest string is the longest,
+    # and then the one with the fewest strings.
+    def key(strings):
+        return (-min(map(len, strings)), len(strings))
+    return min((s for s in sets if s is not None), key=key)
+
+def _concat(x, y):
+    if x.exact is not None and y.exact is not None:
+        exact = _product(x.exact, y.exact)
+        if exact is not None:
+            return _Info(exact=exact)
+    prefix = x.prefix
+    if x.exact is not None:
+        prefix = _product(x.exact, y.prefix) or x.exact
+    suffix = y.suffix
+    if y.exact is not None:
+        suffix = _product(x.suffix, y.exact) or y.exact
+    req = _best(x.req, y.req, _product(x.suffix, y.prefix))
+    return _Info(prefix=prefix, suffix=suffix, req=req)
+
+def _alternate(x, y):
+    if x.exact is not None and y.exact is not None:
+        exact = x.exact | y.exact
+        if len(exact) <= max_set_size:
+            return _Info(exact=exact)
+    def union(xs, ys):
+        if '' in xs or '' in ys:
+            return frozenset({''})
+        result = xs | ys
+        if len(result) > max_set_size:
+            return frozenset({''})
+        return result
+    return _Info(
+        prefix=union(x.prefix, y.prefix),
+        suffix=union(x.suffix, y.suffix),
+        req=union(x.req, y.req),
+    )
+
+class _Parser:
+
+    def __init__(self, s):
+        self.s = s
+        self.i = 0
+
+    def peek(self, n=1):
+        return self.s[self.i:self.i + n]
+
+    def take(self, n=1):
+        result = self.peek(n)
+        if len(result) != n:
+            raise _Unsupported
+        self.i += n
+        return result
+
+    def parse(self):
+        info = self.parse_alternation()
+        if self.i != len(self.s):
+            raise _Unsupported
+        return info
+
+    def parse_alternation(self):
+        info = self.parse_concatenation()
+        while self.peek() == '|':
+            self.take()
+            info = _alternate(info, self.parse_concatenation())
+        return info
+
+    def parse_concatenation(self):
+        info = _empty
+        while self.peek() not in {'', '|', ')'}:
+            info = _concat(info, self.parse_repetition())
+        return info
+
+    def parse_repetition(self):
+        info = self.parse_atom()
+        while True:
+            c = self.peek()
+            if c == '?':
+                self.take()
+                if info.exact is not None:
+                    info = _Info(exact=info.exact | {''})
+                else:
+                    info = _any
+            elif c == '*':
+                self.take()
+                info = _any
+            elif c == '+':
+                self.take()
+                info = _Info(prefix=info.prefix, suffix=info.suffix, req=info.req)
+            elif c == '{':
+                match = _match_repeat(self.s, self.i)
+                if match is None:
+                    raise _Unsupported
+                self.i = match.end()
+                if int(match.group(1) or 0) == 0:
+                    info = _any
+                else:
+                    info = _Info(prefix=info.prefix, suffix=info.suffix, req=info.req)
+            else:
+                return info
+            if self.peek() in {'?', '+'}:
+                # lazy or possessive quantifier
+                self.take()
+
+    def parse_group(self):
+        info = self.parse_alternation()
+        if self.take() != ')':
+            raise _Unsupported
+        return info
+
+    def parse_atom(self):  # pylint: disable=too-many-return-statements
+        c = self.take()
+        if c == '(':
+            if self.peek() != '?':
+                return self.parse_group()
+            self.take()
+            c = self.peek()
+            if c in {'=', '!'} or self.peek(2) in {'<=', '<!'}:
+                # lookaround
+                self.take(1 if c in {'=', '!'} else 2)
+                self.parse_group()
+                return _empty
+            if c == ':':
+                self.take()
+                return self.parse_group()
+            if self.peek(2) == 'P<':
+                end = self.s.index('>', self.i)
+                self.i = end + 1
+                return self.parse_group()
+            if self.peek(2) == 'P=':
+                # backreference
+                end = self.s.index(')', self.i)
+                self.i = end + 1
+                return _any
+            match = _match_flags(self.s, self.i)
+            if match is None:
+                raise _Unsupported
+            self.i = match.end()
+            if match.group(1) == ')':
+                # global flags
+                return _empty
+            # scoped flags
+            return self.parse_group()
+        if c == '[':
+            return self.parse_class()
+        if c == '\\':
+            return self.parse_escape()
+        if c == '.':
+            return _any
+        if c in {'^', '$'}:
+            return _empty
+        if c in {')', '|', '?', '*', '+', '{'}:
+            raise _Unsupported
+        return _Info(exact=frozenset({fold(c)}))
+
+    def parse_escape(self):
+        c = self.take()
+        if c in 'bBAZ':
+            return _empty
+        if c == 's':
+            return _Info(exact=frozenset({' '}))
+        if c.isalnum():
+            return _any
+        return _Info(exact=frozenset({fold(c)}))
+
+    def parse_class(self):
+        chars = set()
+        if self.peek() == '^':
+            self.take()
+            chars = None
+        first = True
+        while True:
+            c = self.take()
+            if c == ']' and not first:
+                break
+            first = False
+            if c == '\\':
+                c = self.take()
+                if c.isalnum():
+                    chars = None
+                    continue
+            if self.peek() == '-' and self.peek(2)[1:] not in {'', ']'}:
+                self.take()
+                d = self.take()
+                if d == '\\' or ord(d) - ord(c) >= max_class_size:
+                    chars = None
+                    continue
+                if chars is not None:
+                    chars.update(map(chr, range(ord(c), ord(d) + 1)))
+                continue
+            if chars is not None:
+                chars.add(c)
+        if chars is None or len(chars) > max_class_size:
+            return _any
+        return _Info(exact=frozenset(map(fold, chars)))
+
+@functools.lru_cache(maxsize=None)
+def _get_whitespace_table():
+    # All the characters matched by \s are in the BMP,
+    # in fact below U+3001.
+    is_space = re.compile(r'\s').fullmatch
+    return {
+        i: ' '
+        for i in range(0x3001)
+        if is_space(chr(i))
+    }
+
+def fold(s):
+    '''
+    normalize case and whitespace
+    '''
+    return s.translate(_get_whitespace_table()).casefold()
+
+def required_literals(regex):
+    '''
+    return set of strings, one of which every match must contain;
+    or empty set if no such strings could be determined
+    '''
+    try:
+        info = _Parser(regex).parse()
+    except (_Unsupported, ValueError):
+        return frozenset()
+    result = _best(info.req, info.prefix, info.suffix)
+    if '' in result:
+        return frozenset()
+    return result
+
+__all__ = [
+    'fold',
+    'required_literals',
+]
+
+# vim:ts=4 sts=4 sw=4 et
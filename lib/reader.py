@@ -0,0 +1,78 @@
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+'''
+fast input reader
+'''
+
+import codecs
+
+from . import text
+
+block_size = 1 << 20
+
+def read_lines(file, *, encoding, errors='strict', force_ucs2=False, normalize=True):
+    '''
+    Decode binary file in large blocks,
+    and yield normalized lines.
+
+    The lines are the same as if the file was opened in text mode
+    (with universal newlines)
+    and each line was passed to text.normalize_line().
+
+    If normalize is false,
+    yield the lines as they are, only without the line terminators.
+    '''
+    decoder = codecs.getincrementaldecoder(encoding)(errors)
+    return _read_lines(file, decoder, force_ucs2=force_ucs2, normalize=normalize)
+
+def _read_lines(file, decoder, *, force_ucs2, normalize):
+    pending = ''
+    final = False
+    while not final:
+        block = file.read(block_size)
+        final = not block
+        s = pending + decoder.decode(block, final)
+        if s.endswith('\r') and not final:
+            # This could be the first half of "\r\n".
+            [s, pending] = [s[:-1], '\r']
+        else:
+            pending = ''
+        if '\r' in s:
+            s = s.replace('\r\n', '\n').replace('\r', '\n')
+        if normalize and force_ucs2 and not s.isascii():
+            # https://github.com/rfk/pyenchant/issues/58
+            s = text.replace_non_bmp(s)
+        lines = s.split('\n')
+        pending = lines.pop() + pending
+        if final and pending:
+            lines += [pending]
+        if not normalize:
+            yield from lines
+        elif '\t' in s:
+            for line in lines:
+                yield line.strip().expandtabs()
+        else:
+            for line in lines:
+                yield line.strip()
+
+__all__ = ['read_lines']
+
+# vim:ts=4 sts=4 sw=4 et
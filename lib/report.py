@@ -0,0 +1,215 @@
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+'''
+machine-readable reports
+'''
+
+import functools
+import json
+import os
+import pathlib
+import urllib.parse
+
+from . import data
+from . import text
+
+sources = {
+    'blacklist': 'misspelling from a blacklist',
+    'spellchecker': 'word unknown to the spell-checker',
+    'multi-word': 'multi-word misspelling',
+}
+
+def find_misspellings(checker, path, lines):
+    '''
+    Check the lines (not normalized) from the file,
+    and yield (line, pos, misspelling) triples, in order:
+    the normalized line, the position of the word in it,
+    and the misspelling as a dict that the writers accept.
+
+    Unlike in checker.Finding,
+    the columns refer to the lines as they are in the file.
+    '''
+    for lineno, raw_line in enumerate(lines, start=1):
+        line = checker.normalize_line(raw_line)
+        for word, pos, certainty, source in checker.check_line(line):
+            yield line, pos, {
+                'file': path,
+                'lineno': lineno,
+                'column': text.denormalize_pos(raw_line, pos) + 1,
+                'end_column': text.denormalize_pos(raw_line, pos + len(word)) + 1,
+                'word': word,
+                'certainty': certainty,
+                'source': source,
+            }
+
+def is_within_limit(occurrences, limit):
+    '''
+    Return whether the word with these occurrences
+    has at most limit instances,
+    not counting instances in identical lines twice.
+    '''
+    return occurrences.count() <= limit
+
+def apply_limit(findings, limit):
+    '''
+    Return list of the (line, pos, misspelling) triples,
+    except words that have more than limit instances,
+    like in the plain output.
+    '''
+    findings = list(findings)
+    misspellings = data.Misspellings(limit=limit)
+    for line, pos, misspelling in findings:
+        misspellings.add(misspelling['word'], line, pos, misspelling['certainty'])
+    words = {
+        word
+        for word, occurrences in misspellings.words()
+        if is_within_limit(occurrences, limit)
+    }
+    return [
+        finding for finding in findings
+        if finding[2]['word'] in words
+    ]
+
+class Writer:
+
+    # Misspellings are dicts with these keys:
+    # file, lineno, column, end_column, word, certainty, source,
+    # and optionally suggestions.
+    # Line and column numbers start at 1;
+    # columns are counted in characters (code points).
+    # Every misspelling is written as soon as it is received,
+    # by the write(misspelling) method that subclasses provide;
+    # the file object is expected to do the buffering.
+
+    def __init__(self, file, *, version=None):
+        self._file = file
+        self.version = version
+
+    def __enter__(self):
+        self.begin()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.end()
+
+    def begin(self):
+        pass
+
+    def end(self):
+        pass
+
+class JSONLinesWriter(Writer):
+
+    def write(self, misspelling):
+        self._file.write(json.dumps(misspelling, ensure_ascii=False) + '\n')
+
+@functools.lru_cache(maxsize=None)
+def _get_uri(path):
+    if os.path.isabs(path):
+        return pathlib.PurePath(path).as_uri()
+    return urllib.parse.quote(path.replace(os.sep, '/'))
+
+class SARIFWriter(Writer):
+
+    # The document is written in pieces:
+    # the header with an empty "results" array is split just before the array ends,
+    # so that results can be appended one by one.
+
+    _tail = ']}]}'
+
+    def __init__(self, file, *, version=None):
+        super().__init__(file, version=version)
+        self._separator = ''
+
+    def begin(self):
+        rules = [
+            {'id': source, 'shortDescription': {'text': description}}
+            for source, description in sources.items()
+        ]
+        document = {
+            '$schema': 'https://json.schemastore.org/sarif-2.1.0.json',
+            'version': '2.1.0',
+            'runs': [{
+                'tool': {
+                    'driver': {
+                        'name': 'mwic',
+                        'version': self.version,
+                        'informationUri': 'https://jwilk.net/software/mwic',
+                        'rules': rules,
+                    },
+                },
+                'columnKind': 'unicodeCodePoints',
+                'results': [],
+            }],
+        }
+        header = json.dumps(document, ensure_ascii=False)
+        assert header.endswith(self._tail)
+        self._file.write(header[:-len(self._tail)])
+
+    def write(self, misspelling):
+        word = misspelling['word']
+        message = f'{sources.get(misspelling["source"], "misspelling")}: {word}'
+        suggestions = misspelling.get('suggestions')
+        if suggestions:
+            message += f' (suggestions: {str.join(", ", suggestions)})'
+        properties = {'certainty': misspelling['certainty']}
+        if suggestions is not None:
+            properties['suggestions'] = suggestions
+        result = {
+            'ruleId': misspelling['source'],
+            'level': 'error' if misspelling['certainty'] > 0 else 'warning',
+            'message': {'text': message},
+            'locations': [{
+                'physicalLocation': {
+                    'artifactLocation': {'uri': _get_uri(misspelling['file'])},
+                    'region': {
+                        'startLine': misspelling['lineno'],
+                        'startColumn': misspelling['column'],
+                        'endColumn': misspelling['end_column'],
+                    },
+                },
+            }],
+            'properties': properties,
+        }
+        self._file.write(self._separator + json.dumps(result, ensure_ascii=False))
+        self._separator = ','
+
+    def end(self):
+        self._file.write(self._tail + '\n')
+
+formats = {
+    'jsonl': JSONLinesWriter,
+    'sarif': SARIFWriter,
+}
+
+__all__ = [
+    'JSONLinesWriter',
+    'SARIFWriter',
+    'Writer',
+    'apply_limit',
+    'find_misspellings',
+    'formats',
+    'is_within_limit',
+    'sources',
+]
+
+# vim:ts=4 sts=4 sw=4 et
@@ -0,0 +1,102 @@
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+'''
+resident spell-checking server
+
+The protocol is simple: the client connects to the Unix socket,
+sends a request (a JSON object), and shuts down the writing side of the
+connection. The server then sends a response (another JSON object), and
+closes the connection.
+'''
+
+import contextlib
+import json
+import os
+import socket
+import socketserver
+import sys
+import traceback
+
+def _dumps(obj):
+    return json.dumps(obj).encode('UTF-8')
+
+def _loads(data):
+    return json.loads(data.decode('UTF-8'))
+
+class Error(RuntimeError):
+    pass
+
+class _Handler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        try:
+            obj = _loads(self.rfile.read())
+            response = self.server.handle(obj)
+        except Exception as exc:  # pylint: disable=broad-except
+            traceback.print_exc()
+            response = {'error': f'{type(exc).__name__}: {exc}'}
+        with contextlib.suppress(BrokenPipeError):
+            self.wfile.write(_dumps(response))
+
+class _Server(socketserver.UnixStreamServer):
+
+    def __init__(self, path, handle):
+        self.handle = handle
+        super().__init__(path, _Handler)
+
+def _remove_stale_socket(path):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except ConnectionRefusedError:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+def serve(path, handle):
+    _remove_stale_socket(path)
+    with _Server(path, handle) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print(file=sys.stderr)
+        finally:
+            os.unlink(path)
+
+def request(path, obj):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        sock.sendall(_dumps(obj))
+        sock.shutdown(socket.SHUT_WR)
+        with sock.makefile('rb') as file:
+            data = file.read()
+    response = _loads(data)
+    if 'error' in response:
+        raise Error(response['error'])
+    return response
+
+__all__ = [
+    'Error',
+    'request',
+    'serve',
+]
+
+# vim:ts=4 sts=4 sw=4 et
@@ -0,0 +1,174 @@
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+'''
+SymSpell-style spelling suggestions
+
+The index maps strings obtained by deleting up to n characters
+from (prefixes of) known words back to these words,
+so that finding candidates for a misspelled word
+only takes looking up its own deletes.
+
+See <https://github.com/wolfgarbe/SymSpell> for details.
+'''
+
+import hashlib
+import os
+
+from . import cache
+
+def read_frequencies(path):
+    # Read word-frequency list,
+    # with either "word count" or only "word" on each line.
+    # Lines starting with "#" are ignored.
+    with open(path, 'rt', encoding='UTF-8') as file:
+        for line in file:
+            if line[:1] == '#':
+                continue
+            line = line.split()
+            if not line:
+                continue
+            count = 1
+            if len(line) >= 2:
+                try:
+                    count = int(line[1])
+                except ValueError:
+                    pass
+            yield line[0], count
+
+def _get_deletes(s, n):
+    # Return strings obtained by deleting up to n characters from s.
+    result = {s}
+    level = {s}
+    for _ in range(n):
+        level = {
+            t[:i] + t[i + 1:]
+            for t in level
+            for i in range(len(t))
+        }
+        result |= level
+    return result
+
+def get_distance(s, t, limit):
+    # Return the optimal string alignment distance between s and t
+    # (i.e. Levenshtein distance that also allows transpositions
+    # of adjacent characters),
+    # or limit + 1 if it's greater than limit.
+    if abs(len(s) - len(t)) > limit:
+        return limit + 1
+    prev_row = []
+    row = list(range(len(t) + 1))
+    for i, sc in enumerate(s, start=1):
+        [prev_prev_row, prev_row, row] = [prev_row, row, [i] * (len(t) + 1)]
+        for j, tc in enumerate(t, start=1):
+            value = min(
+                prev_row[j] + 1,
+                row[j - 1] + 1,
+                prev_row[j - 1] + (sc != tc),
+            )
+            if i > 1 and j > 1 and sc == t[j - 2] and s[i - 2] == tc:
+                value = min(value, prev_prev_row[j - 2] + 1)
+            row[j] = value
+        if min(row) > limit:
+            return limit + 1
+    return min(row[-1], limit + 1)
+
+def _match_case(word, suggestion):
+    if word.isupper() and len(word) > 1:
+        return suggestion.upper()
+    if word[:1].isupper():
+        return suggestion[:1].upper() + suggestion[1:]
+    return suggestion
+
+class Index:
+
+    def __init__(self, *, max_distance=2, prefix_length=7):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self._counts = {}
+        self._deletes = {}
+
+    def add(self, word, count=1):
+        if word in self._counts:
+            self._counts[word] += count
+            return
+        self._counts[word] = count
+        key = word.lower()[:self.prefix_length]
+        for delete in _get_deletes(key, self.max_distance):
+            self._deletes.setdefault(delete, []).append(word)
+
+    def __len__(self):
+        return len(self._counts)
+
+    def suggest(self, word):
+        # Return list of known words within max_distance from the word,
+        # the closest and most frequent first.
+        max_distance = self.max_distance
+        key = word.lower()
+        candidates = set()
+        for delete in _get_deletes(key[:self.prefix_length], max_distance):
+            candidates.update(self._deletes.get(delete, ()))
+        ranked = []
+        for candidate in candidates:
+            distance = get_distance(key, candidate.lower(), max_distance)
+            if 0 < distance <= max_distance:
+                ranked += [(distance, -self._counts[candidate], candidate)]
+        ranked.sort()
+        suggestions = (_match_case(word, candidate) for _, _, candidate in ranked)
+        return list(dict.fromkeys(suggestions))
+
+def get_index(paths, words=(), *, cache_dir=None):
+    # Return Index built from the word-frequency lists and the extra words.
+    # Building the index is slow,
+    # so keep it in a cache, if available.
+    def build():
+        index = Index()
+        for path in paths:
+            for word, count in read_frequencies(path):
+                index.add(word, count)
+        for word in words:
+            index.add(word)
+        return index
+    if cache_dir is None:
+        return build()
+    words = sorted(words)
+    digest = hashlib.sha256()
+    for word in words:
+        digest.update(word.encode('UTF-8', 'surrogatepass') + b'\0')
+    key = repr((
+        cache.file_digest(__file__),
+        [cache.file_digest(path) for path in paths],
+        digest.hexdigest(),
+    ))
+    cache_path = os.path.join(cache_dir, 'symspell.pickle')
+    index = cache.load_object(cache_path, key, classes=[Index])
+    if index is None:
+        index = build()
+        cache.store_object(cache_path, key, index)
+    return index
+
+__all__ = [
+    'Index',
+    'get_distance',
+    'get_index',
+    'read_frequencies',
+]
+
+# vim:ts=4 sts=4 sw=4 et
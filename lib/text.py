@@ -47,6 +47,69 @@ def rtrim(s, n, *, char='…'):
         return char
     return match.group(1) + char
 
+_non_bmp_sub = re.compile(r'[^\0-\uFFFF]').sub
+
+def replace_non_bmp(s):
+    return _non_bmp_sub('\uFFFD', s)
+
+def normalize_line(line, *, force_ucs2=False):
+    if force_ucs2:
+        # https://github.com/rfk/pyenchant/issues/58
+        line = replace_non_bmp(line)
+    line = line.strip()
+    line = line.expandtabs()
+    return line
+
+def denormalize_pos(line, pos):
+    '''
+    Return position in the line
+    that corresponds to position pos in normalize_line(line).
+    '''
+    stripped = line.lstrip()
+    offset = len(line) - len(stripped)
+    if '\t' not in stripped:
+        return offset + pos
+    col = 0
+    for i, ch in enumerate(stripped):
+        if col >= pos:
+            return offset + i
+        if ch == '\t':
+            col += 8 - col % 8
+        else:
+            col += 1
+    return offset + len(stripped)
+
+# Characters that can appear inside (but not at the start or end of) words,
+# as in enchant.tokenize.<language>:
+_tokenizer_valid_chars = {
+    'de': '-.',
+}
+
+def get_tokenizer(language):
+    '''
+    Return a tokenizer equivalent to enchant.tokenize.get_tokenizer(language),
+    but implemented with a single regular expression.
+    '''
+    # enchant.tokenize first splits text on whitespace
+    # and strips some punctuation from the chunks,
+    # but that doesn't affect the results,
+    # because neither whitespace nor the stripped punctuation can appear inside words.
+    tag = language.replace('-', '_')
+    [base, *_] = tag.split('_')
+    valid_chars = _tokenizer_valid_chars.get(tag, _tokenizer_valid_chars.get(base, "'"))
+    valid_chars = re.escape(valid_chars)
+    # Letters, possibly followed by combining marks,
+    # optionally separated by runs of valid chars:
+    letter = r'\p{L}\p{M}*'
+    regex = fr'{letter}(?:[{valid_chars}]*{letter})*'
+    finditer = re.compile(regex).finditer
+    def tokenizer(s):
+        return [
+            (match.group(), match.start())
+            for match in finditer(s)
+        ]
+    return tokenizer
+
 _camel_case_split = re.compile('([A-Z][^A-Z]*)').split
 
 def camel_case_tokenizer(tokenizer):
@@ -64,7 +127,11 @@ def camel_case_tokenizer(tokenizer):
 
 __all__ = [
     'camel_case_tokenizer',
+    'denormalize_pos',
+    'get_tokenizer',
     'ltrim',
+    'normalize_line',
+    'replace_non_bmp',
     'rtrim',
 ]
 
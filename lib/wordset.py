@@ -0,0 +1,79 @@
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+'''
+memory-efficient sets of words in various cases
+'''
+
+_lower = 1
+_title = 2
+_upper = 4
+
+def _get_form(word, key):
+    if word == key:
+        return _lower
+    if word == key.upper():
+        return _upper
+    if word == key.title():
+        return _title
+    return 0
+
+class WordSet:
+
+    # Behaves like a set of strings,
+    # but the lower-case, title-case and upper-case forms of a word
+    # are stored as a single lower-case key
+    # plus bit flags telling which of the forms are in the set.
+    # Words in any other case are stored as they are.
+
+    def __init__(self, words=()):
+        self._forms = {}
+        self._other = set()
+        for word in words:
+            self.add(word)
+
+    def add(self, word):
+        key = word.lower()
+        form = _get_form(word, key)
+        if form:
+            self._forms[key] = self._forms.get(key, 0) | form
+        else:
+            self._other.add(word)
+
+    def __contains__(self, word):
+        key = word.lower()
+        forms = self._forms.get(key)
+        if forms is not None and forms & _get_form(word, key):
+            return True
+        return word in self._other
+
+    def __iter__(self):
+        for key, forms in self._forms.items():
+            if forms & _lower:
+                yield key
+            if forms & _title:
+                yield key.title()
+            if forms & _upper:
+                yield key.upper()
+        yield from self._other
+
+__all__ = ['WordSet']
+
+# vim:ts=4 sts=4 sw=4 et
@@ -18,25 +18,38 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import contextlib
 import glob
 import io
+import json
 import os
 import random
 import signal
+import sqlite3
 import string
 import sys
+import tempfile
 import unittest.mock
 
 import lib.cli as M
 
 from .tools import (
+    assert_equal,
     assert_in,
     assert_multi_line_equal,
+    assert_raises,
 )
 
 here = os.path.dirname(__file__)
 here = os.path.relpath(here)
 
+@contextlib.contextmanager
+def _temporary_cache_home():
+    # Don't write to the user's cache directory.
+    with tempfile.TemporaryDirectory(prefix='mwic.') as cache_home:
+        with unittest.mock.patch.dict(os.environ, XDG_CACHE_HOME=cache_home):
+            yield
+
 def _get_output(*args, stdin=''):
     argv = ['mwic', *args]
     binstdin = io.BytesIO(stdin.encode('UTF-8'))
@@ -45,7 +58,7 @@ def _get_output(*args, stdin=''):
     textstdout = io.TextIOWrapper(binstdout, encoding='UTF-8')
     sys_patch = unittest.mock.patch.multiple(sys, argv=argv, stdin=textstdin, stdout=textstdout)
     signal_patch = unittest.mock.patch('signal.signal')
-    with sys_patch, signal_patch:
+    with _temporary_cache_home(), sys_patch, signal_patch:
         try:
             try:
                 M.main()
@@ -69,6 +82,244 @@ def test_max_context_width():
     text = _get_output('--language', 'en', '--max-context-width=2', stdin=f'yes {bad_word} yes')
     assert_in(f'… {bad_word} …', text)
 
+def test_jobs():
+    paths = sorted(glob.glob(here + '/*.txt'))
+    serial_text = _get_output('--language', 'en-US', *paths)
+    parallel_text = _get_output('--language', 'en-US', '--jobs=3', *paths)
+    assert_multi_line_equal(serial_text, parallel_text)
+
+def test_jobs_cache_dir():
+    paths = sorted(glob.glob(here + '/multiword-*.txt'))
+    serial_text = _get_output('--language', 'en-US', *paths)
+    with tempfile.TemporaryDirectory(prefix='mwic.') as cache_dir:
+        for _ in range(2):
+            parallel_text = _get_output('--language', 'en-US', '--jobs=3', f'--cache-dir={cache_dir}', *paths)
+            assert_multi_line_equal(serial_text, parallel_text)
+            # The main process writes what the workers computed:
+            db = sqlite3.connect(os.path.join(cache_dir, 'findings.sqlite'))
+            with contextlib.closing(db):
+                [[count]] = db.execute('SELECT COUNT(*) FROM findings')
+            assert_equal(count, len(paths))
+
+def test_cache_dir_new():
+    path = here + '/alice.txt'
+    with tempfile.TemporaryDirectory(prefix='mwic.') as tmpdir:
+        cache_dir = os.path.join(tmpdir, 'new', 'cache')
+        for language in 'und', 'en-US':
+            text = _get_output('--language', language, path)
+            cached_text = _get_output('--language', language, f'--cache-dir={cache_dir}', path)
+            assert_multi_line_equal(text, cached_text)
+        cache_dir = os.path.join(tmpdir, 'file')
+        with open(cache_dir, 'wb'):
+            pass
+        with unittest.mock.patch('sys.stderr', io.StringIO()) as stderr:
+            with assert_raises(SystemExit) as cm:
+                _get_output('--language', 'en-US', f'--cache-dir={cache_dir}', path)
+        assert_equal(cm.exception.code, 1)
+        assert_equal(stderr.getvalue(), f'mwic: {cache_dir}: File exists\n')
+
+def test_suggest_jobs():
+    paths = sorted(glob.glob(here + '/multiword-*.txt'))
+    serial_text = _get_output('--language', 'en-US', '--suggest=2', *paths)
+    for args in [], ['--reverse']:
+        parallel_text = _get_output('--language', 'en-US', '--suggest=2', '--jobs=3', *args, *paths)
+        if not args:
+            assert_multi_line_equal(serial_text, parallel_text)
+        assert_in(' (', parallel_text)
+
+def test_two_phase():
+    paths = sorted(glob.glob(here + '/*.txt'))
+    paths += paths
+    serial_text = _get_output('--language', 'en-US', *paths)
+    for jobs in 1, 3:
+        two_phase_text = _get_output('--language', 'en-US', '--two-phase', f'--jobs={jobs}', *paths)
+        assert_multi_line_equal(serial_text, two_phase_text)
+
+def test_lazy_context():
+    paths = sorted(glob.glob(here + '/*.txt'))
+    text = _get_output('--language', 'en-US', *paths)
+    lazy_text = _get_output('--language', 'en-US', '--lazy-context', *paths)
+    assert_multi_line_equal(text, lazy_text)
+
+def test_lazy_context_bom():
+    with tempfile.NamedTemporaryFile(prefix='mwic.', suffix='.txt', mode='w+t', encoding='UTF-8-sig') as file:
+        file.write('bacn and and eggs\nbacn\n')
+        file.flush()
+        args = ['--language', 'en-US', '--input-encoding=UTF-8-sig', file.name]
+        text = _get_output(*args)
+        lazy_text = _get_output('--lazy-context', *args)
+    assert_multi_line_equal(text, lazy_text)
+    assert_in('| bacn and and eggs', text)
+
+def _get_headers(text):
+    return [
+        line for line in text.splitlines()
+        if line.endswith(':')
+    ]
+
+def _get_max_contexts(text):
+    return max(
+        block.count('\n| ')
+        for block in text.split('\n\n')
+    )
+
+def test_max_contexts():
+    paths = sorted(glob.glob(here + '/*.txt'))
+    text = _get_output('--language', 'en-US', *paths)
+    sampled_text = None
+    for args in [], ['--jobs=3'], ['--two-phase'], ['--lazy-context']:
+        other_text = _get_output('--language', 'en-US', '--max-contexts=1', *args, *paths)
+        if sampled_text is None:
+            sampled_text = other_text
+        else:
+            assert_multi_line_equal(sampled_text, other_text)
+    assert_equal(_get_headers(sampled_text), _get_headers(text))
+    assert_equal(_get_max_contexts(text), 2)
+    assert_equal(_get_max_contexts(sampled_text), 1)
+
+def _get_blocks(text, n):
+    return str.join('', [block + '\n\n' for block in text.split('\n\n')[:n]])
+
+def test_max_words_lines():
+    paths = sorted(glob.glob(here + '/*.txt'))
+    for args in [], ['--reverse']:
+        text = _get_output('--language', 'en-US', *args, *paths)
+        rare_text = _get_output('--language', 'en-US', '--max-words=0', *args, *paths)
+        common_text = _get_output('--language', 'en-US', '--max-lines=0', *args, *paths)
+        if args:
+            assert_multi_line_equal(text, common_text + rare_text)
+        else:
+            assert_multi_line_equal(text, rare_text + common_text)
+        top_text = _get_output('--language', 'en-US', '--max-words=3', '--max-lines=2', *args, *paths)
+        top_rare_text = _get_blocks(rare_text, 2)
+        top_common_text = _get_blocks(common_text, 3)
+        if args:
+            assert_multi_line_equal(top_text, top_common_text + top_rare_text)
+        else:
+            assert_multi_line_equal(top_text, top_rare_text + top_common_text)
+
+def test_jsonl():
+    paths = sorted(glob.glob(here + '/*.txt'))
+    text = _get_output('--language', 'en-US', '-f', 'jsonl', *paths)
+    parallel_text = _get_output('--language', 'en-US', '-f', 'jsonl', '--jobs=3', *paths)
+    assert_multi_line_equal(text, parallel_text)
+    misspellings = [json.loads(line) for line in text.splitlines()]
+    lines = {}
+    for path in paths:
+        with open(path, 'rt', encoding='UTF-8') as file:
+            lines[path] = file.read().splitlines()
+    for misspelling in misspellings:
+        line = lines[misspelling['file']][misspelling['lineno'] - 1]
+        word = line[misspelling['column'] - 1:misspelling['end_column'] - 1]
+        assert_equal(word.split(), misspelling['word'].split())
+    plain_text = _get_output('--language', 'en-US', *paths)
+    for word in {misspelling['word'] for misspelling in misspellings}:
+        assert_in(word, plain_text)
+
+def test_sarif():
+    paths = sorted(glob.glob(here + '/multiword-*.txt'))
+    jsonl_text = _get_output('--language', 'en-US', '-f', 'jsonl', '--suggest=1', *paths)
+    misspellings = [json.loads(line) for line in jsonl_text.splitlines()]
+    sarif_text = _get_output('--language', 'en-US', '-f', 'sarif', '--suggest=1', *paths)
+    [run] = json.loads(sarif_text)['runs']
+    assert_equal(run['tool']['driver']['name'], 'mwic')
+    results = run['results']
+    assert_equal(len(results), len(misspellings))
+    for result, misspelling in zip(results, misspellings):
+        assert_equal(result['ruleId'], misspelling['source'])
+        [location] = result['locations']
+        location = location['physicalLocation']
+        assert_equal(location['artifactLocation']['uri'], misspelling['file'])
+        region = location['region']
+        assert_equal(
+            (region['startLine'], region['startColumn'], region['endColumn']),
+            (misspelling['lineno'], misspelling['column'], misspelling['end_column']),
+        )
+        assert_equal(result['properties']['suggestions'], misspelling['suggestions'])
+    empty_text = _get_output('--language', 'en-US', '-f', 'sarif', stdin='')
+    [run] = json.loads(empty_text)['runs']
+    assert_equal(run['results'], [])
+
+def test_limit_formats():
+    words = [random_word() for x in range(4)]
+    [w1, w2, w3, w4] = words
+    stdin = (
+        f'{w1} {w1} {w1}\n' +
+        f'{w2} here\n' * 3 +
+        f'ok {w2}\n' +
+        f'{w3} a\n{w3} b\n{w3} c\n' +
+        f'{w4}\n'
+    )
+    plain_text = _get_output('--language', 'en-US', '--limit=2', stdin=stdin)
+    plain_words = {word for word in words if word in plain_text}
+    assert_equal(plain_words, {w2, w4})
+    jsonl_text = _get_output('--language', 'en-US', '-f', 'jsonl', '--limit=2', stdin=stdin)
+    jsonl_words = {json.loads(line)['word'] for line in jsonl_text.splitlines()}
+    assert_equal(jsonl_words & set(words), plain_words)
+    sarif_text = _get_output('--language', 'en-US', '-f', 'sarif', '--limit=2', stdin=stdin)
+    [run] = json.loads(sarif_text)['runs']
+    sarif_words = {
+        result['message']['text'].rsplit(': ', 1)[1]
+        for result in run['results']
+    }
+    assert_equal(sarif_words & set(words), plain_words)
+
+def test_known_words():
+    paths = sorted(glob.glob(here + '/*.txt'))
+    text = _get_output('--language', 'en-US', *paths)
+    with tempfile.TemporaryDirectory(prefix='mwic.') as tmpdir:
+        known_words = os.path.join(tmpdir, 'known-words')
+        _get_output('--language', 'en-US', '--save-known-words', known_words, *paths)
+        with open(known_words, 'rt', encoding='UTF-8') as file:
+            assert_in('the\n', file.readlines())
+        for order in 'blacklist,known-words,spellchecker,whitelist', 'known-words,whitelist,blacklist,spellchecker':
+            known_text = _get_output('--language', 'en-US',
+                '--known-words', known_words, '--lookup-order', order, *paths
+            )
+            assert_multi_line_equal(text, known_text)
+
+def test_server_request():
+    paths = sorted(glob.glob(here + '/*.txt'))
+    text = _get_output('--language', 'en-US', '-f', 'plain', *paths)
+    with unittest.mock.patch.object(M, 'serve') as serve:
+        _get_output('--serve', 'socket')
+    [[options], _] = serve.call_args
+    files = []
+    for path in paths:
+        with open(path, 'rt', encoding='UTF-8') as file:
+            files += [[path, file.read()]]
+    request = {
+        'options': {'language': 'en-US', 'output_format': 'plain'},
+        'files': files,
+    }
+    with _temporary_cache_home():
+        response = M._handle_request(options, {}, request)  # pylint: disable=protected-access
+    assert_multi_line_equal(text, response['report'])
+
+def test_server_blacklist_change():
+    with unittest.mock.patch.object(M, 'serve') as serve:
+        _get_output('--serve', 'socket')
+    [[options], _] = serve.call_args
+    contexts = {}
+    with tempfile.TemporaryDirectory(prefix='mwic.') as tmpdir, _temporary_cache_home():
+        path = os.path.join(tmpdir, 'blacklist')
+        request = {
+            'options': {'language': 'en-US', 'blacklist': [path]},
+            'files': [['-', 'Abandonned eggs. Eggz and spam.\n']],
+            'findings': True,
+        }
+        for n, word in enumerate(['abandonned', 'eggz']):
+            with open(path, 'wt', encoding='UTF-8') as file:
+                file.write(f'{word}\n')
+            os.utime(path, ns=(n, n))
+            response = M._handle_request(options, contexts, request)  # pylint: disable=protected-access
+            assert_equal(len(contexts), 1)
+            blacklisted = [
+                finding['word'].lower() for finding in response['findings']
+                if finding['source'] == 'blacklist'
+            ]
+            assert_equal(blacklisted, [word])
+
 def _test_text(xpath):
     assert xpath.endswith('.exp')
     if '@' in xpath:
@@ -0,0 +1,201 @@
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import collections
+import os
+import tempfile
+
+import lib.cache as M
+import lib.data
+import lib.lines
+
+from .tools import (
+    assert_equal,
+)
+
+def test_verdict_cache():
+    words = {'eggs': True, 'bacn': False, 'spam': True}
+    calls = []
+    def check(word):
+        calls.append(word)
+        return words[word]
+    with tempfile.TemporaryDirectory(prefix='mwic.') as tmpdir:
+        path = os.path.join(tmpdir, 'verdicts.sqlite')
+        stats = collections.Counter()
+        cache = M.VerdictCache(path, 'key', stats=stats)
+        cached_check = cache.wrap(check)
+        for word, ok in words.items():
+            assert_equal(cached_check(word), ok)
+        cache.close()
+        assert_equal(calls, list(words))
+        assert_equal(stats, {'verdict cache misses': 3})
+        stats.clear()
+        cache = M.VerdictCache(path, 'key', stats=stats)
+        cached_check = cache.wrap(check)
+        for word, ok in words.items():
+            assert_equal(cached_check(word), ok)
+        cache.close()
+        assert_equal(calls, list(words))
+        assert_equal(stats, {'verdict cache hits': 3})
+        stats.clear()
+        cache = M.VerdictCache(path, 'other-key', stats=stats)
+        cached_check = cache.wrap(check)
+        assert_equal(cached_check('eggs'), True)
+        cache.close()
+        assert_equal(stats, {'verdict cache misses': 1})
+
+def test_verdict_cache_eviction():
+    with tempfile.TemporaryDirectory(prefix='mwic.') as tmpdir:
+        path = os.path.join(tmpdir, 'verdicts.sqlite')
+        for n in range(5):
+            cache = M.VerdictCache(path, 'key', stats=collections.Counter(), max_size=3)
+            cache.wrap(bool)(f'w{n}')
+            cache._now = n  # pylint: disable=protected-access
+            cache.close()
+        stats = collections.Counter()
+        cache = M.VerdictCache(path, 'key', stats=stats)
+        cached_check = cache.wrap(bool)
+        for n in range(5):
+            cached_check(f'w{n}')
+        cache.close()
+        assert_equal(stats, {'verdict cache misses': 2, 'verdict cache hits': 3})
+
+def test_verdict_cache_eviction_same_run():
+    with tempfile.TemporaryDirectory(prefix='mwic.') as tmpdir:
+        path = os.path.join(tmpdir, 'verdicts.sqlite')
+        cache = M.VerdictCache(path, 'key', stats=collections.Counter(), max_size=100)
+        cached_check = cache.wrap(bool)
+        for n in range(101):
+            cached_check(f'w{n}')
+        cache.close()
+        stats = collections.Counter()
+        cache = M.VerdictCache(path, 'key', stats=stats)
+        cached_check = cache.wrap(bool)
+        for n in range(101):
+            cached_check(f'w{n}')
+        cache.close()
+        assert_equal(stats, {'verdict cache misses': 1, 'verdict cache hits': 100})
+
+def test_findings_cache_eviction_same_run():
+    with tempfile.TemporaryDirectory(prefix='mwic.') as tmpdir:
+        path = os.path.join(tmpdir, 'findings.sqlite')
+        cache = M.FindingsCache(path, 'key', stats=collections.Counter(), max_size=2)
+        for key in 'abc':
+            cache.put(key, lib.data.Misspellings())
+        cache.close()
+        stats = collections.Counter()
+        cache = M.FindingsCache(path, 'key', stats=stats)
+        for key in 'abc':
+            cache.get(key)
+        cache.close()
+        assert_equal(stats, {'findings cache misses': 1, 'findings cache hits': 2})
+
+def test_suggestion_cache():
+    words = {'bacn': ['bacon', 'back'], 'xyzzy': []}
+    calls = []
+    def suggest(word):
+        calls.append(word)
+        return words[word]
+    with tempfile.TemporaryDirectory(prefix='mwic.') as tmpdir:
+        path = os.path.join(tmpdir, 'suggestions.sqlite')
+        for n in range(2):
+            stats = collections.Counter()
+            cache = M.SuggestionCache(path, 'key', stats=stats)
+            cached_suggest = cache.wrap(suggest)
+            for word, suggestions in words.items():
+                assert_equal(list(cached_suggest(word)), suggestions)
+            cache.close()
+            assert_equal(calls, list(words))
+            if n == 0:
+                assert_equal(stats, {'suggestion cache misses': 2})
+            else:
+                assert_equal(stats, {'suggestion cache hits': 2})
+
+def test_findings_cache():
+    with tempfile.TemporaryDirectory(prefix='mwic.') as tmpdir:
+        db_path = os.path.join(tmpdir, 'findings.sqlite')
+        paths = []
+        for n in range(2):
+            path = os.path.join(tmpdir, f'{n}.txt')
+            with open(path, 'wt', encoding='UTF-8') as file:
+                file.write('eggs bacn\n')
+            paths += [path]
+        [path, copy_path] = paths
+        stats = collections.Counter()
+        cache = M.FindingsCache(db_path, 'key', stats=stats)
+        key = cache.get_key(path)
+        assert_equal(cache.get(key), None)
+        source = lib.lines.Source(path, encoding='UTF-8', errors='strict')
+        misspellings = lib.data.Misspellings()
+        for line, lazy_line in source.open():
+            misspellings.add('bacn', lazy_line, 5, 0)
+        cache.put(key, misspellings)
+        cache.close()
+        stats.clear()
+        cache = M.FindingsCache(db_path, 'key', stats=stats)
+        key = cache.get_key(copy_path)
+        os.unlink(path)
+        copy_source = lib.lines.Source(copy_path, encoding='UTF-8', errors='strict')
+        misspellings = cache.get(key, source=copy_source)
+        cache.close()
+        assert_equal(stats, {'findings cache hits': 1})
+        [(line, occurrences)] = misspellings.sorted_lines()
+        assert_equal(str(line), 'eggs bacn')
+        assert_equal(occurrences.count(), 1)
+        stats.clear()
+        cache = M.FindingsCache(db_path, 'other-key', stats=stats)
+        key = cache.get_key(copy_path)
+        assert_equal(cache.get(key, source=copy_source), None)
+        cache.close()
+        assert_equal(stats, {'findings cache misses': 1})
+
+class _Unsafe:
+
+    def __init__(self, path):
+        self.path = path
+
+    def __reduce__(self):
+        return (os.unlink, (self.path,))
+
+def test_load_object_unsafe():
+    with tempfile.TemporaryDirectory(prefix='mwic.') as tmpdir:
+        path = os.path.join(tmpdir, 'object.pickle')
+        canary_path = os.path.join(tmpdir, 'canary')
+        with open(canary_path, 'wb'):
+            pass
+        M.store_object(path, 'key', ['spam', frozenset({'eggs'})])
+        assert_equal(M.load_object(path, 'key'), ['spam', frozenset({'eggs'})])
+        M.store_object(path, 'key', collections.OrderedDict())
+        assert_equal(M.load_object(path, 'key', classes=[lib.data.Misspellings]), None)
+        M.store_object(path, 'key', _Unsafe(canary_path))
+        assert_equal(M.load_object(path, 'other-key'), None)
+        assert_equal(os.path.exists(canary_path), True)
+
+def test_findings_cache_unsafe():
+    with tempfile.TemporaryDirectory(prefix='mwic.') as tmpdir:
+        db_path = os.path.join(tmpdir, 'findings.sqlite')
+        stats = collections.Counter()
+        cache = M.FindingsCache(db_path, 'key', stats=stats)
+        cache.put('key', collections.OrderedDict())
+        assert_equal(cache.get('key'), None)
+        cache.close()
+        assert_equal(stats, {'findings cache misses': 1})
+
+# vim:ts=4 sts=4 sw=4 et
@@ -0,0 +1,165 @@
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import io
+import os
+import tempfile
+import unittest.mock
+
+import lib.checker as M
+
+from .test_extdict import tmpdict
+from .tools import (
+    assert_equal,
+    assert_in,
+    assert_not_in,
+    assert_raises,
+)
+
+def test_check_text():
+    with M.Checker('en-US') as checker:
+        findings = list(checker.check_text('eggs\r\nham and and\tspam\n'))
+    assert_in(
+        M.Finding('and and', 'ham and and     spam', 2, 4, 1, 'multi-word'),
+        findings
+    )
+    for finding in findings:
+        assert_equal(finding.line[finding.column:][:len(finding.word)], finding.word)
+
+def test_check_lines():
+    s = 'bacon and\tand  eggs\nspam\n'
+    with M.Checker('en-US') as checker:
+        assert_equal(
+            list(checker.check_text(s)),
+            list(checker.check_lines(io.StringIO(s))),
+        )
+
+def test_blacklist():
+    with tmpdict('abandonned||abandoned\n') as path:
+        checker = M.Checker('en-US', blacklist=[path])
+    with checker:
+        findings = list(checker.check_text('Abandonned eggs'))
+    assert_in(
+        M.Finding('Abandonned', 'Abandonned eggs', 1, 0, 1, 'blacklist'),
+        findings
+    )
+
+def test_suggest():
+    with tmpdict('abandonned||abandoned\n') as path:
+        checker = M.Checker('en-US', blacklist=[path])
+    with checker:
+        assert_equal(checker.suggest('Abandonned'), ['Abandoned'])
+        assert_equal(checker.stats['suggestions: blacklist'], 1)
+        assert_equal(checker.stats['suggestions: spellchecker'], 0)
+        checker.suggest('eggz')
+        assert_equal(checker.stats['suggestions: spellchecker'], 1)
+
+def test_suggest_symspell():
+    with tmpdict('eggs 10\nergs 1\n') as path:
+        with M.Checker('en-US', suggest_engine='symspell', suggest_words=[path]) as checker:
+            assert_equal(checker.suggest('Eggz'), ['Eggs', 'Ergs'])
+            assert_equal(checker.stats['suggestions: symspell'], 1)
+            assert_equal(checker.stats['suggestions: spellchecker'], 0)
+    with assert_raises(ValueError):
+        M.Checker('en-US', suggest_engine='aspell')
+
+def test_known_words():
+    with tmpdict('eggz\n') as path:
+        checker = M.Checker('en-US', known_words=[path], record_accepted=True)
+    with checker:
+        findings = list(checker.check_text('eggz and spam'))
+        assert_equal(findings, [])
+        assert_equal(checker.stats['lookups: known-words hits'], 1)
+        assert_equal(checker.stats['lookups: spellchecker hits'], 2)
+        assert_not_in('eggz', checker.accepted_words)
+        assert_in('spam', checker.accepted_words)
+    with M.Checker('en-US') as checker:
+        list(checker.check_text('eggz and spam'))
+        assert_equal(checker.accepted_words, set())
+
+def test_lookup_order():
+    with tmpdict('eggz\n') as path:
+        checker = M.Checker('en-US', blacklist=[path], known_words=[path],
+            lookup_order=['known-words', 'blacklist', 'spellchecker', 'whitelist'],
+        )
+    with checker:
+        findings = list(checker.check_text('eggz'))
+    assert_equal(findings, [])
+    with assert_raises(ValueError):
+        M.Checker('en-US', lookup_order=['blacklist', 'spellchecker'])
+
+def test_line_cache():
+    s = 'bacon and and eggs\nspam\n' * 3
+    with M.Checker('en-US') as checker:
+        expected = list(checker.check_text(s))
+    with M.Checker('en-US', line_cache_size=1) as checker:
+        assert_equal(list(checker.check_text(s)), expected)
+        checker.flush()
+        assert_equal(checker.stats['line cache hits'], 0)
+        assert_equal(checker.stats['line cache misses'], 6)
+    with M.Checker('en-US', line_cache_size=2) as checker:
+        assert_equal(list(checker.check_text(s)), expected)
+        checker.flush()
+        assert_equal(checker.stats['line cache hits'], 4)
+        assert_equal(checker.stats['line cache misses'], 2)
+
+def test_dictionary_key():
+    with tempfile.TemporaryDirectory(prefix='mwic.') as tmpdir:
+        config_dir = os.path.join(tmpdir, 'enchant')
+        dict_dir = os.path.join(tmpdir, 'hunspell')
+        cache_dir = os.path.join(tmpdir, 'cache')
+        os.mkdir(config_dir)
+        os.mkdir(dict_dir)
+        config_patch = unittest.mock.patch('enchant.get_user_config_dir', lambda: config_dir, create=True)
+        dirs_patch = unittest.mock.patch.object(M, 'dictionary_dirs', [dict_dir])
+        env_patch = unittest.mock.patch.dict(os.environ, DICPATH='')
+        def check():
+            with M.Checker('en-US', cache_dir=cache_dir) as checker:
+                list(checker.check_text('bacn'))
+            return {
+                key: value for key, value in checker.stats.items()
+                if key.startswith('verdict cache ')
+            }
+        def touch(path, mtime):
+            with open(path, 'at', encoding='UTF-8') as file:
+                file.write('bacn\n')
+            os.utime(path, ns=(mtime, mtime))
+        with config_patch, dirs_patch, env_patch:
+            assert_equal(check(), {'verdict cache misses': 1})
+            assert_equal(check(), {'verdict cache hits': 1})
+            pwl_path = os.path.join(config_dir, 'en_US.dic')
+            touch(pwl_path, 1)
+            assert_equal(check(), {'verdict cache misses': 1})
+            touch(pwl_path, 2)
+            assert_equal(check(), {'verdict cache misses': 1})
+            assert_equal(check(), {'verdict cache hits': 1})
+            touch(os.path.join(dict_dir, 'en_US.dic'), 1)
+            assert_equal(check(), {'verdict cache misses': 1})
+
+def test_tokenizer():
+    s = "Ham'n'eggs and\tand spam, e.g. bacon\n"
+    with M.Checker('en-US') as checker:
+        expected = list(checker.check_text(s))
+    with M.Checker('en-US', tokenizer='fast') as checker:
+        assert_equal(list(checker.check_text(s)), expected)
+    with assert_raises(ValueError):
+        M.Checker('en-US', tokenizer='spam')
+
+# vim:ts=4 sts=4 sw=4 et
@@ -0,0 +1,269 @@
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import pickle
+import random
+
+import lib.data as M
+
+from .tools import (
+    assert_equal,
+)
+
+def _dump(misspellings):
+    return [
+        (word, occurrences.certainty, occurrences.count(), sorted(occurrences))
+        for word, occurrences in misspellings.sorted_words()
+    ]
+
+def test_update():
+    lines = [
+        ('eggs bacon', [('eggs', 0, 0), ('bacon', 5, 1)]),
+        ('spam eggs', [('eggs', 5, 0), ('spam', 0, 0)]),
+        ('eggs eggs', [('eggs', 0, 0), ('eggs', 5, 0)]),
+    ]
+    serial = M.Misspellings()
+    for line, findings in lines:
+        for word, pos, certainty in findings:
+            serial.add(word, line, pos, certainty)
+    merged = M.Misspellings()
+    for line, findings in lines:
+        partial = M.Misspellings()
+        for word, pos, certainty in findings:
+            partial.add(word, line, pos, certainty)
+        merged.update(partial)
+    assert_equal(_dump(merged), _dump(serial))
+    assert_equal(
+        [line for line, _ in merged.sorted_lines()],
+        [line for line, _ in serial.sorted_lines()],
+    )
+
+def test_sorting():
+    misspellings = M.Misspellings()
+    misspellings.add('eggs', 'eggs ham', 0, 0)
+    misspellings.add('spam', 'spam spam', [0, 5], 0)
+    misspellings.add('ham', 'eggs ham', 5, 0)
+    misspellings.add('ham', 'ham', 0, 1)
+    misspellings.add('ham', 'ham', 0, 0)
+    for reverse in False, True:
+        words = misspellings.sorted_words(reverse=reverse)
+        for _, occurrences in words:
+            assert_equal(
+                occurrences.count(),
+                sum(len(positions) for _, _, positions in occurrences),
+            )
+        summary = [
+            (word, occurrences.certainty, occurrences.count())
+            for word, occurrences in words
+        ]
+        expected = [('ham', 1, 2), ('eggs', 0, 1), ('spam', 0, 2)]
+        if reverse:
+            expected.reverse()
+        assert_equal(summary, expected)
+        lines = [line for line, _ in misspellings.sorted_lines(reverse=reverse)]
+        expected = ['ham', 'eggs ham', 'spam spam']
+        if reverse:
+            expected = ['eggs ham', 'spam spam', 'ham']
+        assert_equal(lines, expected)
+
+def test_sorting_top():
+    rng = random.Random(0)
+    misspellings = M.Misspellings()
+    for i in range(500):
+        line = f'{i} ' + str.join(' ', rng.choices(['eggs', 'ham', 'spam', 'bacon', 'tomato'], k=3))
+        word = rng.choice(line.split()[1:])
+        misspellings.add(word, line, line.index(word), rng.randint(0, 1))
+    def predicate(item):
+        [_, occurrences] = item
+        return occurrences.count() % 3 != 0
+    def summary(items):
+        return [
+            (s, occurrences.certainty, occurrences.count())
+            for s, occurrences in items
+        ]
+    for reverse in False, True:
+        for method in misspellings.sorted_words, misspellings.sorted_lines:
+            items = method(reverse=reverse)
+            filtered_items = [item for item in items if predicate(item)]
+            assert_equal(summary(method(reverse=reverse, predicate=predicate)), summary(filtered_items))
+            for n in 0, 1, 3, 1000:
+                assert_equal(summary(method(reverse=reverse, n=n)), summary(items[:n]))
+                assert_equal(
+                    summary(method(reverse=reverse, n=n, predicate=predicate)),
+                    summary(filtered_items[:n]),
+                )
+
+def test_max_contexts():
+    lines = [
+        ('eggs eggs', [('eggs', 0, 0), ('eggs', 5, 0)]),
+        ('spam eggs', [('spam', 0, 0), ('eggs', 5, 1)]),
+        ('ham eggs', [('eggs', 4, 0)]),
+        ('spam spam', [('spam', 0, 0), ('spam', 5, 0)]),
+    ]
+    full = M.Misspellings()
+    serial = M.Misspellings(max_contexts=1)
+    merged = M.Misspellings(max_contexts=1)
+    for line, findings in lines:
+        partial = M.Misspellings(max_contexts=1)
+        for word, pos, certainty in findings:
+            for misspellings in full, serial, partial:
+                misspellings.add(word, line, pos, certainty)
+        merged.update(pickle.loads(pickle.dumps(partial)))
+    summary = [
+        (word, occurrences.certainty, occurrences.count(), len(occurrences))
+        for word, occurrences in full.sorted_words()
+    ]
+    assert_equal(summary, [('eggs', 1, 4, 3), ('spam', 0, 3, 2)])
+    for misspellings in serial, merged:
+        words = misspellings.sorted_words()
+        assert_equal([
+            (word, occurrences.certainty, occurrences.count(), len(occurrences))
+            for word, occurrences in words
+        ], summary)
+        assert_equal(
+            [occurrences.sorted_context() for _, occurrences in words],
+            [
+                [('eggs ', 'eggs', ''), ('', 'eggs', ' eggs')],
+                [('', 'spam', ' eggs')],
+            ]
+        )
+
+def test_limit():
+    lines = [
+        ('eggs eggs', [('eggs', 0, 0), ('eggs', 5, 0)]),
+        ('spam spam spam ham', [('spam', 0, 1), ('spam', 5, 1), ('spam', 10, 1), ('ham', 15, 0)]),
+        ('spam eggs', [('spam', 0, 0), ('eggs', 5, 0)]),
+    ]
+    full = M.Misspellings()
+    serial = M.Misspellings(limit=2)
+    merged = M.Misspellings(limit=2)
+    for line, findings in lines:
+        partial = M.Misspellings(limit=2)
+        for word, pos, certainty in findings:
+            for misspellings in full, serial, partial:
+                misspellings.add(word, line, pos, certainty)
+        merged.update(pickle.loads(pickle.dumps(partial)))
+        if line == 'spam spam spam ham':
+            # spam occurred more than twice, but in only one line:
+            [(word, occurrences), _, _] = serial.sorted_words()
+            assert_equal((word, occurrences.count(), len(occurrences)), ('spam', 3, 1))
+    summary = [
+        (word, occurrences.certainty, occurrences.count(), len(occurrences))
+        for word, occurrences in full.sorted_words()
+    ]
+    assert_equal(summary, [('spam', 1, 4, 2), ('ham', 0, 1, 1), ('eggs', 0, 3, 2)])
+    for misspellings in serial, merged:
+        # eggs and spam occurred more than twice in more than one line,
+        # so they were forgotten:
+        words = misspellings.sorted_words()
+        assert_equal([
+            (word, occurrences.certainty, occurrences.count(), len(occurrences))
+            for word, occurrences in words
+        ], summary[1:2])
+        [(_, occurrences)] = words
+        assert_equal(occurrences.sorted_context(), [('spam spam spam ', 'ham', '')])
+        assert_equal(
+            [(line, occurrences.certainty, occurrences.count()) for line, occurrences in misspellings.sorted_lines()],
+            [('spam spam spam ham', 0, 1)],
+        )
+
+def test_repeated_lines():
+    # Identical lines are the same line, no matter where they occur,
+    # so findings from them must not be counted twice,
+    # even if they are not kept.
+    lines = [
+        ('eggs', [('eggs', 0, 0)]),
+        ('spam eggs eggs', [('spam', 0, 0), ('eggs', 5, 0), ('eggs', 10, 0)]),
+        ('ham eggs', [('eggs', 4, 1)]),
+        ('spam eggs eggs', [('spam', 0, 0), ('eggs', 5, 0), ('eggs', 10, 0)]),
+        ('spam eggs eggs', [('spam', 0, 0), ('eggs', 5, 0), ('eggs', 10, 0)]),
+        ('ham eggs', [('eggs', 4, 1)]),
+        ('eggs', [('eggs', 0, 0)]),
+    ]
+    full = M.Misspellings()
+    for line, findings in lines:
+        for word, pos, certainty in findings:
+            full.add(word, line, pos, certainty)
+    summary = [
+        (word, occurrences.certainty, occurrences.count(), len(occurrences))
+        for word, occurrences in full.sorted_words()
+    ]
+    assert_equal(summary, [('eggs', 1, 4, 3), ('spam', 0, 1, 1)])
+    for kwargs in {'max_contexts': 1}, {'limit': 4}, {'limit': 3}, {'max_contexts': 1, 'limit': 3}:
+        if kwargs.get('limit') == 3:
+            # eggs occurred more than 3 times, so it was forgotten:
+            expected = summary[1:]
+        else:
+            expected = summary
+        serial = M.Misspellings(**kwargs)
+        merged = M.Misspellings(**kwargs)
+        for line, findings in lines:
+            partial = M.Misspellings(**kwargs)
+            for word, pos, certainty in findings:
+                for misspellings in serial, partial:
+                    misspellings.add(word, line, pos, certainty)
+            merged.update(pickle.loads(pickle.dumps(partial)))
+        for misspellings in serial, merged:
+            assert_equal([
+                (word, occurrences.certainty, occurrences.count(), len(occurrences))
+                for word, occurrences in misspellings.sorted_words()
+            ], expected)
+
+def test_limit_memory():
+    # Nothing is kept about the findings of forgotten words,
+    # so their number doesn't affect the size of the object.
+    def get_size(n):
+        serial = M.Misspellings(limit=2)
+        merged = M.Misspellings(limit=2)
+        for i in range(n):
+            line = f'{i:05} eggs'
+            partial = M.Misspellings(limit=2)
+            for misspellings in serial, partial:
+                misspellings.add('eggs', line, 6, i % 2)
+            merged.update(pickle.loads(pickle.dumps(partial)))
+        serial.add('spam', 'spam', 0, 0)
+        merged.add('spam', 'spam', 0, 0)
+        assert_equal([word for word, _ in merged.sorted_words()], ['spam'])
+        assert_equal(len(pickle.dumps(merged)), len(pickle.dumps(serial)))
+        return len(pickle.dumps(serial))
+    assert_equal(get_size(10000), get_size(10))
+
+def test_pickle():
+    misspellings = M.Misspellings()
+    misspellings.add('eggs', 'eggs bacon eggs', [0, 11], 0)
+    misspellings.add('bacon', 'eggs bacon eggs', 5, 1)
+    misspellings.add('eggs', 'spam eggs', 5, 0)
+    misspellings.add('eggs', 'spam eggs', 5, 1)
+    copy = pickle.loads(pickle.dumps(misspellings))
+    assert_equal(_dump(copy), _dump(misspellings))
+    assert_equal(
+        [(line, sorted(occurrences)) for line, occurrences in copy.sorted_lines()],
+        [(line, sorted(occurrences)) for line, occurrences in misspellings.sorted_lines()],
+    )
+    [_, (word, occurrences)] = copy.sorted_words()
+    assert_equal(word, 'eggs')
+    assert_equal((occurrences.certainty, occurrences.count(), len(occurrences)), (1, 3, 2))
+    assert_equal(occurrences.sorted_context(), [
+        ('spam ', 'eggs', ''),
+        ('eggs bacon ', 'eggs', ''),
+        ('', 'eggs', ' bacon eggs'),
+    ])
+
+# vim:ts=4 sts=4 sw=4 et
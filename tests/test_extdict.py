@@ -20,13 +20,16 @@
 
 import contextlib
 import functools
+import os
 import tempfile
 
 import lib.extdict as M
 
 from .tools import (
+    assert_equal,
     assert_in,
     assert_not_in,
+    assert_raises,
 )
 
 
@@ -134,4 +137,75 @@ def test_plain():
     t({'abandonned', 'Abandonned', 'ABANDONNED'}, {'abandoned'})
     t({'Portugese'}, {'portugese', 'PORTUGESE'})
 
+def test_corrections():
+    with tmpdict(lintian_dict + lintian_case_dict + codespell_dict) as path:
+        d = M.Dictionary(path)
+    with tmpdict(kde_dict) as path:
+        kd = M.Dictionary(path)
+    with tempfile.TemporaryDirectory(prefix='mwic.') as tmpdir:
+        compiled_path = os.path.join(tmpdir, 'compiled')
+        d.save(compiled_path)
+        cd = M.Dictionary(compiled_path)
+        for dd in d, cd:
+            assert_equal(dd.get_corrections('abandonned'), ('abandoned',))
+            assert_equal(dd.get_corrections('Abandonned'), ('Abandoned',))
+            assert_equal(dd.get_corrections('ABANDONNED'), ('ABANDONED',))
+            assert_equal(dd.get_corrections('aBandonned'), ())
+            assert_equal(dd.get_corrections('abandoned'), ())
+            assert_equal(dd.get_corrections('Upto'), ('Up to',))
+            assert_equal(dd.get_corrections('american'), ('American',))
+            assert_equal(dd.get_corrections('American'), ())
+            assert_equal(dd.get_corrections('SLang'), ('S-Lang',))
+            assert_equal(dd.get_corrections('clas'), ('class',))
+            assert_equal(dd.get_corrections('Intented'), ('Intended', 'Indented'))
+        assert_equal(kd.get_corrections('aasumes'), ('assumes',))
+    with tmpdict(plain_dict) as path:
+        d = M.Dictionary(path)
+    assert_equal(d.get_corrections('abandonned'), ())
+
+def test_compiled():
+    with tempfile.TemporaryDirectory(prefix='mwic.') as tmpdir:
+        compiled_path = os.path.join(tmpdir, 'compiled')
+        for data in lintian_dict, lintian_case_dict, codespell_dict, kde_dict, plain_dict:
+            with tmpdict(data) as path:
+                d = M.Dictionary(path)
+                d.save(compiled_path)
+            cd = M.Dictionary(compiled_path)
+            words = set(d._dict)  # pylint: disable=protected-access
+            [table] = cd._tables  # pylint: disable=protected-access
+            assert_equal({word for word, _ in table.items()}, words)
+            t = functools.partial(_test_dict, d=cd)
+            t(words, {'', '\0', 'a', 'zzz', 'éclair', 'spam\udcff'} - words)
+
+def test_compiled_mixed():
+    with tempfile.TemporaryDirectory(prefix='mwic.') as tmpdir:
+        compiled_path = os.path.join(tmpdir, 'compiled')
+        with tmpdict(lintian_dict) as path:
+            M.Dictionary(path).save(compiled_path)
+        with tmpdict(plain_dict) as path:
+            d = M.Dictionary(compiled_path, path)
+            t = functools.partial(_test_dict, d=d)
+            t({'abandonned', 'upto', 'Portugese'}, {'abandoned', 'up to'})
+            d.save(compiled_path)
+        d = M.Dictionary(compiled_path)
+        t = functools.partial(_test_dict, d=d)
+        t({'abandonned', 'upto', 'Portugese'}, {'abandoned', 'up to'})
+
+def test_compiled_malformed():
+    with tempfile.TemporaryDirectory(prefix='mwic.') as tmpdir:
+        compiled_path = os.path.join(tmpdir, 'compiled')
+        with tmpdict(plain_dict) as path:
+            M.Dictionary(path).save(compiled_path)
+        with open(compiled_path, 'rb') as file:
+            data = file.read()
+        for size in len(M.Table.magic), len(data) - 1:
+            with open(compiled_path, 'wb') as file:
+                file.write(data[:size])
+            with assert_raises(ValueError):
+                M.Dictionary(compiled_path)
+        with open(compiled_path, 'wb') as file:
+            file.write(data[:-1] + b'\xFF' * 100)
+        with assert_raises(ValueError):
+            M.Dictionary(compiled_path)
+
 # vim:ts=4 sts=4 sw=4 et
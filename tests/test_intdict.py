@@ -0,0 +1,116 @@
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import glob
+import os
+import random
+import tempfile
+import unittest.mock
+
+import lib.intdict as M
+import lib.text
+
+from .tools import (
+    assert_equal,
+    assert_in,
+)
+
+here = os.path.dirname(__file__)
+
+def _test_prefilter(lang, lines):
+    prefiltered = M.Dictionary(lang)
+    unfiltered = M.Dictionary(lang, prefilter=False)
+    for line in lines:
+        assert_equal(
+            list(prefiltered.find(line)),
+            list(unfiltered.find(line)),
+        )
+
+def test_prefilter_corpus():
+    lines = []
+    for path in sorted(glob.glob(here + '/*.txt')):
+        with open(path, 'rt', encoding='UTF-8') as file:
+            lines += [lib.text.normalize_line(line) for line in file]
+    for lang in 'en', 'en-GB', 'pl':
+        _test_prefilter(lang, lines)
+
+def test_prefilter_random():
+    # Shuffle words from the multi-word misspellings,
+    # so that many rules match (or almost match) in the same line.
+    words = []
+    for path in sorted(glob.glob(here + '/multiword-*.txt')):
+        with open(path, 'rt', encoding='UTF-8') as file:
+            words += file.read().split()
+    words += ['IT', 'It’s', 'Its', 'Not', 'a', 'the', '.', ',']
+    rng = random.Random(0)
+    lines = [
+        str.join(rng.choice(' \xa0'), rng.choices(words, k=rng.randint(1, 12)))
+        for i in range(3000)
+    ]
+    _test_prefilter('en', lines)
+
+def test_prefilter_multichar_fold():
+    # "İ".casefold() is "i̇", but the regexes match "İ" as "i":
+    lines = ['İts an', 'İts not', 'ITS NOT', 'Straße is', '\ufb01xed it us']
+    _test_prefilter('en', lines)
+    d = M.Dictionary('en')
+    assert_equal(list(d.find('İts not')), [('İts not', 0)])
+
+def test_cache():
+    line = 'Let’s the the spam allow to'
+    expected = list(M.Dictionary('en').find(line))
+    with tempfile.TemporaryDirectory(prefix='mwic.') as tmpdir:
+        cache_dir = os.path.join(tmpdir, 'cache')
+        for _ in range(2):
+            for prefilter in True, False:
+                d = M.Dictionary('en', prefilter=prefilter, cache_dir=cache_dir)
+                assert_equal(list(d.find(line)), expected)
+                assert_equal(d.is_whitelisted('Ubuntu'), True)
+        with unittest.mock.patch.object(M.Dictionary, '_parse', side_effect=AssertionError):
+            d = M.Dictionary('en', cache_dir=cache_dir)
+        assert_equal(list(d.find(line)), expected)
+        assert_equal(d.is_whitelisted('Ubuntu'), True)
+        [path] = glob.glob(os.path.join(cache_dir, '*'))
+        with open(path, 'wb') as file:
+            file.write(b'spam')
+        d = M.Dictionary('en', cache_dir=cache_dir)
+        assert_equal(list(d.find(line)), expected)
+
+def test_profile():
+    lines = [
+        ('1', 'Let’s the the spam allow to'),
+        ('2', 'spam'),
+        ('3', 'the the ham and the the eggs'),
+    ]
+    for prefilter in True, False:
+        d = M.Dictionary('en', prefilter=prefilter)
+        profiles = {
+            profile.source: profile
+            for profile in d.profile(lines)
+        }
+        profile = profiles['$ART $ART']
+        assert_equal(profile.location, 'dict/en:8')
+        assert_equal(profile.lines, 2 if prefilter else 3)
+        assert_equal(profile.matches, 3)
+        [worst_time, worst_key] = profile.worst
+        assert_in(worst_key, {'1', '3'})
+        assert_equal(0 < worst_time <= profile.time, True)
+
+# vim:ts=4 sts=4 sw=4 et
@@ -0,0 +1,71 @@
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import pickle
+import tempfile
+
+import lib.lines as M
+import lib.text
+
+from .tools import (
+    assert_equal,
+    assert_not_equal,
+)
+
+data = 'eggs\r\nham\rspam\t spam\n\n  bacon \xe9\nham\nsausage'
+
+def test_source():
+    with tempfile.NamedTemporaryFile(prefix='mwic.', suffix='.txt', mode='w+t', encoding='UTF-8', newline='') as file:
+        file.write(data)
+        file.flush()
+        with open(file.name, 'rt', encoding='UTF-8') as text_file:
+            expected = [lib.text.normalize_line(line) for line in text_file]
+        source = M.Source(file.name, encoding='UTF-8', errors='strict')
+        result = list(source.open())
+        assert_equal([line for line, _ in result], expected)
+        for line, lazy_line in result:
+            assert_equal(str(lazy_line), line)
+            lazy_line = pickle.loads(pickle.dumps(lazy_line))
+            assert_equal(str(lazy_line), line)
+        lazy_lines = [lazy_line for _, lazy_line in result]
+        assert_equal(lazy_lines[1], lazy_lines[5])
+        assert_equal(hash(lazy_lines[1]), hash(lazy_lines[5]))
+        assert_not_equal(lazy_lines[0], lazy_lines[1])
+
+def test_bom():
+    with tempfile.NamedTemporaryFile(prefix='mwic.', suffix='.txt', mode='w+t', encoding='UTF-8-sig') as file:
+        file.write('eggs\nham\n')
+        file.flush()
+        expected = ['eggs', 'ham']
+        source = M.Source(file.name, encoding='UTF-8-sig', errors='strict')
+        result = list(source.open())
+        assert_equal([line for line, _ in result], expected)
+        for line, lazy_line in result:
+            assert_equal(str(lazy_line), line)
+
+def test_not_ascii_compatible():
+    try:
+        M.Source('/dev/null', encoding='UTF-16', errors='strict')
+    except LookupError:
+        pass
+    else:
+        raise AssertionError('LookupError not raised')
+
+# vim:ts=4 sts=4 sw=4 et
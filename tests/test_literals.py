@@ -0,0 +1,71 @@
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import lib.literals as M
+
+from .tools import (
+    assert_equal,
+)
+
+def t(regex, expected):
+    assert_equal(M.required_literals(regex), frozenset(expected))
+
+def test_literal():
+    t('eggs', {'eggs'})
+    t('EGGS', {'eggs'})
+    t(r'eggs\s+ham', {'eggs '})
+
+def test_alternation():
+    t('eggs|ham', {'eggs', 'ham'})
+    t('(eggs|ham) and', {'eggs and', 'ham and'})
+    t('eggs|', set())
+
+def test_repetition():
+    t('spam(s)?', {'spam', 'spams'})
+    t('spam(s)*', {'spam'})
+    t('(spam)+', {'spam'})
+    t('(spam){2,}', {'spam'})
+    t('(spam){0,2}', set())
+
+def test_class():
+    t('e[.]g', {'e.g'})
+    t('Licen[cs]e', {'licence', 'license'})
+    t('[a-c]at', {'aat', 'bat', 'cat'})
+    t(r'[A-Za-z]+\s+spam', {' spam'})
+    t(r'[^\W_]+', set())
+
+def test_lookaround():
+    t('can not(?! only)', {'can not'})
+    t('(?<!is )it us', {'it us'})
+
+def test_backreference():
+    t(r'(?P<dupl>[a-z]+)\s+(?P=dupl)', {' '})
+
+def test_flags():
+    t('(?-i:Blu-Ray)', {'blu-ray'})
+
+def test_unsupported():
+    t('spam(', set())
+    t('(?#spam)', set())
+
+def test_fold():
+    assert_equal(M.fold('Spam\xa0 EGGS\N{KELVIN SIGN}'), 'spam  eggsk')
+
+# vim:ts=4 sts=4 sw=4 et
@@ -0,0 +1,88 @@
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import io
+import random
+import unittest.mock
+
+import lib.reader as M
+import lib.text
+
+from .tools import (
+    assert_equal,
+)
+
+def read_lines_slowly(data, *, encoding, errors, force_ucs2=False):
+    file = io.TextIOWrapper(io.BytesIO(data), encoding=encoding, errors=errors)
+    return [
+        lib.text.normalize_line(line, force_ucs2=force_ucs2)
+        for line in file
+    ]
+
+def _test(data, *, encoding='UTF-8', errors='replace', force_ucs2=False):
+    expected = read_lines_slowly(data, encoding=encoding, errors=errors, force_ucs2=force_ucs2)
+    for block_size in 1, 2, 3, 7, 1 << 20:
+        with unittest.mock.patch.object(M, 'block_size', block_size):
+            result = list(M.read_lines(io.BytesIO(data), encoding=encoding, errors=errors, force_ucs2=force_ucs2))
+            raw_result = list(M.read_lines(io.BytesIO(data), encoding=encoding, errors=errors, force_ucs2=force_ucs2,
+                normalize=False,
+            ))
+        assert_equal(result, expected)
+        assert_equal(
+            [lib.text.normalize_line(line, force_ucs2=force_ucs2) for line in raw_result],
+            expected,
+        )
+    for line, normalized_line in zip(raw_result, expected):
+        if force_ucs2:
+            line = lib.text.replace_non_bmp(line)
+        for pos, ch in enumerate(normalized_line):
+            if ch != ' ':
+                assert_equal(line[lib.text.denormalize_pos(line, pos)], ch)
+
+def test_newlines():
+    _test(b'')
+    _test(b'\n')
+    _test(b'eggs')
+    _test(b'eggs\nham\r\nspam\rbacon\r\r\n\n\r')
+    _test(b'eggs\r')
+
+def test_whitespace():
+    _test(b' \teggs\tham  \n\tspam\t\n')
+
+def test_non_ascii():
+    data = 'eggs\N{NO-BREAK SPACE}\N{MATHEMATICAL BOLD SMALL A}\t\N{EM DASH}\r\nham'.encode('UTF-8')
+    _test(data)
+    _test(data, force_ucs2=True)
+    _test(data.decode('UTF-8').encode('UTF-16'), encoding='UTF-16')
+
+def test_errors():
+    data = b'eggs \xff\xfe ham\n\xc4'
+    _test(data, errors='replace')
+    _test(data, errors='surrogateescape')
+    _test(data, encoding='ISO-8859-2', errors='strict')
+
+def test_random():
+    rnd = random.Random(0)
+    alphabet = b'ab \t\r\n\xc4\x85\xff'
+    for _ in range(200):
+        data = bytes(rnd.choice(alphabet) for _ in range(rnd.randrange(20)))
+        _test(data)
+
+# vim:ts=4 sts=4 sw=4 et
@@ -0,0 +1,55 @@
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import tempfile
+import threading
+
+import lib.server as M
+
+from .tools import (
+    assert_equal,
+)
+
+def test_request():
+    def handle(request):
+        if request.get('fail'):
+            raise ValueError('eggs')
+        return {'words': str.join(' ', request['words']).split()}
+    with tempfile.TemporaryDirectory(prefix='mwic.') as tmpdir:
+        path = os.path.join(tmpdir, 'socket')
+        server = M._Server(path, handle)  # pylint: disable=protected-access
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            response = M.request(path, {'words': ['eggs ham', 'spam\udcff']})
+            assert_equal(response, {'words': ['eggs', 'ham', 'spam\udcff']})
+            try:
+                M.request(path, {'fail': True})
+            except M.Error as exc:
+                assert_equal(str(exc), 'ValueError: eggs')
+            else:
+                raise AssertionError('Error not raised')
+        finally:
+            server.shutdown()
+            thread.join()
+            server.server_close()
+
+# vim:ts=4 sts=4 sw=4 et
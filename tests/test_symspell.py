@@ -0,0 +1,110 @@
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import functools
+import glob
+import os
+import random
+import tempfile
+import unittest.mock
+
+import lib.symspell as M
+
+from .tools import (
+    assert_equal,
+)
+
+def _get_distance(s, t):
+    # slow, but obviously correct
+    @functools.lru_cache(maxsize=None)
+    def d(i, j):
+        if i == 0 or j == 0:
+            return i + j
+        result = min(
+            d(i - 1, j) + 1,
+            d(i, j - 1) + 1,
+            d(i - 1, j - 1) + (s[i - 1] != t[j - 1]),
+        )
+        if i > 1 and j > 1 and s[i - 1] == t[j - 2] and s[i - 2] == t[j - 1]:
+            result = min(result, d(i - 2, j - 2) + 1)
+        return result
+    return d(len(s), len(t))
+
+def test_distance():
+    rng = random.Random(0)
+    for _ in range(2000):
+        [s, t] = [
+            str.join('', rng.choices('abc', k=rng.randint(0, 6)))
+            for _ in range(2)
+        ]
+        distance = _get_distance(s, t)
+        for limit in range(4):
+            assert_equal(
+                M.get_distance(s, t, limit),
+                min(distance, limit + 1),
+            )
+
+def test_suggest():
+    index = M.Index()
+    for word, count in [('the', 100), ('then', 10), ('ten', 5), ('tea', 3), ('Ubuntu', 1), ('definitely', 2)]:
+        index.add(word, count)
+    assert_equal(index.suggest('teh'), ['the', 'ten', 'tea', 'then'])
+    assert_equal(index.suggest('Teh'), ['The', 'Ten', 'Tea', 'Then'])
+    assert_equal(index.suggest('TEH'), ['THE', 'TEN', 'TEA', 'THEN'])
+    assert_equal(index.suggest('the'), ['then', 'ten', 'tea'])
+    assert_equal(index.suggest('ubunut'), ['Ubuntu'])
+    assert_equal(index.suggest('definately'), ['definitely'])
+    assert_equal(index.suggest('xyzzy'), [])
+
+def test_suggest_exhaustive():
+    here = os.path.dirname(__file__)
+    words = set()
+    for path in sorted(glob.glob(here + '/*.txt')):
+        with open(path, 'rt', encoding='UTF-8') as file:
+            words.update(word.lower() for word in file.read().split() if word.isalpha())
+    words = sorted(words)
+    index = M.Index()
+    for word in words:
+        index.add(word)
+    rng = random.Random(0)
+    for word in rng.sample(words, 50):
+        expected = {
+            other for other in words
+            if 0 < _get_distance(word, other) <= index.max_distance
+        }
+        assert_equal(set(index.suggest(word)), expected)
+
+def test_get_index():
+    with tempfile.TemporaryDirectory(prefix='mwic.') as tmpdir:
+        path = os.path.join(tmpdir, 'freq.txt')
+        with open(path, 'wt', encoding='UTF-8') as file:
+            file.write('# comment\nthen 10\nthe 100\nten\n')
+        cache_dir = os.path.join(tmpdir, 'cache')
+        for _ in range(2):
+            for cd in None, cache_dir:
+                index = M.get_index([path], ['tea'], cache_dir=cd)
+                assert_equal(index.suggest('teh'), ['the', 'tea', 'ten', 'then'])
+        with unittest.mock.patch.object(M, 'read_frequencies', side_effect=AssertionError):
+            index = M.get_index([path], ['tea'], cache_dir=cache_dir)
+        assert_equal(index.suggest('teh'), ['the', 'tea', 'ten', 'then'])
+        index = M.get_index([path], [], cache_dir=cache_dir)
+        assert_equal(index.suggest('teh'), ['the', 'ten', 'then'])
+
+# vim:ts=4 sts=4 sw=4 et
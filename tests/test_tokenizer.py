@@ -0,0 +1,92 @@
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import glob
+import os
+import random
+import sys
+import unicodedata
+
+import enchant.tokenize
+
+import lib.text as M
+
+from .tools import (
+    assert_equal,
+)
+
+here = os.path.dirname(__file__)
+
+def enchant_tokenizer(language):
+    try:
+        return enchant.tokenize.get_tokenizer(language)
+    except enchant.errors.TokenizerNotFoundError:
+        return enchant.tokenize.get_tokenizer(None)
+
+languages = ['en', 'en-US', 'en_GB', 'de', 'de-CH', 'fr', 'und']
+
+def _test_equivalence(s):
+    for language in languages:
+        expected = list(enchant_tokenizer(language)(s))
+        assert_equal(M.get_tokenizer(language)(s), expected)
+
+def test_corpus():
+    for path in sorted(glob.glob(here + '/*.txt')):
+        with open(path, 'rt', encoding='UTF-8') as file:
+            for line in file:
+                _test_equivalence(line)
+
+alphabet = (
+    'aZ\xe9\u0142\u03a9\u05d0\u4e00\U0001d49c'  # letters
+    '\u0301\u0308\u0903'  # combining marks
+    "'-.\u2019\"`()[]!,?;:_0"
+    ' \t\x1c\xa0\u2003'
+)
+
+def test_random():
+    rng = random.Random(0)
+    for _ in range(2000):
+        s = str.join('', rng.choices(alphabet, k=rng.randint(0, 20)))
+        _test_equivalence(s)
+
+def test_unicode():
+    # Compare character classes for every character known to Python.
+    # (The regex module might know about characters
+    # that are not assigned yet in Python's Unicode database.)
+    tokenizer = M.get_tokenizer('en')
+    for i in range(sys.maxunicode + 1):
+        ch = chr(i)
+        category = unicodedata.category(ch)
+        if category == 'Cn':
+            continue
+        if ch.isalpha():
+            assert_equal(tokenizer(ch), [(ch, 0)])
+        elif category[0] == 'M':
+            assert_equal(tokenizer(f'a{ch}'), [(f'a{ch}', 0)])
+        else:
+            assert_equal(tokenizer(f'a{ch}'), [('a', 0)])
+
+def test_camel_case():
+    s = "eggAndSpam Eggs'n'Bacon SPAM"
+    tokenizer = M.camel_case_tokenizer(M.get_tokenizer('en'))
+    expected = list(M.camel_case_tokenizer(enchant_tokenizer('en'))(s))
+    assert_equal(list(tokenizer(s)), expected)
+
+# vim:ts=4 sts=4 sw=4 et
@@ -20,7 +20,7 @@
 
 import os
 
-from lib.cli import __version__
+from lib.version import __version__
 
 from .tools import (
     assert_equal,
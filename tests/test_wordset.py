@@ -0,0 +1,49 @@
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import random
+
+import lib.wordset as M
+
+from .tools import (
+    assert_equal,
+)
+
+def test_random():
+    rng = random.Random(0)
+    alphabet = 'aAbBßẞǆǅǄİıiIσςΣ-1 '
+    words = [
+        str.join('', rng.choices(alphabet, k=rng.randint(1, 4)))
+        for i in range(5000)
+    ]
+    for n in 10, 100, 1000:
+        expected = set()
+        wordset = M.WordSet()
+        for word in words[:n]:
+            for variant in word, word.lower(), word.title(), word.upper():
+                if rng.random() < 0.5:
+                    expected.add(variant)
+                    wordset.add(variant)
+        for word in words:
+            for variant in word, word.lower(), word.title(), word.upper(), word.swapcase():
+                assert_equal(variant in wordset, variant in expected)
+        assert_equal(sorted(wordset), sorted(expected))
+
+# vim:ts=4 sts=4 sw=4 et
@@ -29,6 +29,7 @@ assert_is_instance = tc.assertIsInstance
 assert_multi_line_equal = tc.assertMultiLineEqual
 assert_not_equal = tc.assertNotEqual
 assert_not_in = tc.assertNotIn
+assert_raises = tc.assertRaises
 
 del tc
 